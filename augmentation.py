@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Hızlı, vektörel veri arttırma işlemleri. Dalga formu işlemleri sıfırla doldurulmuş
+(N, örnek) klip yığınları ve gerçek uzunluklar üzerinde, SpecAugment maskeleri ise
+(N, n_mfcc, çerçeve) MFCC tensörleri üzerinde tek geçişte çalışır. librosa'nın faz
+vokoderi tabanlı pitch_shift / time_stretch işlemlerine göre çok daha ucuzdur.
+"""
+
+import numpy as np
+
+SPEED_RANGE = (0.9, 1.1)  # Yeniden örnekleme ile hız değişimi oranı
+NOISE_SNR_DB = (10.0, 30.0)  # Eklenen beyaz gürültünün sinyal/gürültü oranı aralığı
+GAIN_DB = (-6.0, 6.0)  # Kazanç aralığı
+MAX_SHIFT = 1600  # En büyük zaman kaydırma (örnek; 16 kHz'de 0.1 s)
+FREQ_MASK = 8  # SpecAugment frekans maskesi en büyük genişliği (MFCC katsayısı)
+TIME_MASK = 8  # SpecAugment zaman maskesi en büyük genişliği (çerçeve)
+
+WAVEFORM_AUGMENTATIONS = ('speed', 'noise', 'gain', 'shift')
+FEATURE_AUGMENTATIONS = ('specaugment',)
+
+class RowGenerators:
+    """
+    Yığının her satırı için ayrı bir np.random.Generator'dan çeken, Generator benzeri sarmalayıcı.
+    Arttırmalar tüm yığında tek geçişte çalışırken her klibin rastgele değerleri yalnızca kendi
+    üretecine bağlı kalır; sonuç klibin hangi yığında ve hangi komşularla işlendiğinden bağımsızdır.
+    """
+
+    def __init__(self, generators):
+        self.generators = list(generators)
+
+    def _rows(self, size):
+        n = size if np.ndim(size) == 0 else size[0]
+        if n is not None and n != len(self.generators):
+            raise ValueError("Yığın %d satır, %d üreteç var" % (n, len(self.generators)))
+        return len(self.generators)
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        self._rows(size)
+        return np.array([g.uniform(low, high) for g in self.generators])
+
+    def integers(self, low, high=None, size=None):
+        n = self._rows(size)
+        lows = np.broadcast_to(low, n) if high is not None else np.zeros(n, dtype=np.int64)
+        highs = np.broadcast_to(high if high is not None else low, n)
+        return np.array([g.integers(lo, hi) for g, lo, hi in zip(self.generators, lows, highs)], dtype=np.int64)
+
+    def standard_normal(self, size, dtype=np.float64):
+        self._rows(size)
+        # Her satır tek bir tohum çekip kendi alt üretecini kullanır; böylece yığının doldurulmuş
+        # genişliği satırın üretecinden ne kadar sayı tükettiğini değiştirmez
+        return np.stack([np.random.default_rng(g.integers(2 ** 63)).standard_normal(size[1:], dtype=dtype)
+                         for g in self.generators])
+
+def pad_batch(clips):
+    """Farklı uzunluktaki klipleri sıfırla doldurulmuş (N, örnek) dizisine ve uzunluklara dönüştürür."""
+    lengths = np.array([len(clip) for clip in clips], dtype=np.int64)
+    batch = np.zeros((len(clips), max(lengths.max(initial=0), 1)), dtype=np.float32)
+    for i, clip in enumerate(clips):
+        batch[i, :len(clip)] = clip
+    return batch, lengths
+
+def _valid_mask(clips, lengths):
+    return np.arange(clips.shape[1])[np.newaxis, :] < np.asarray(lengths)[:, np.newaxis]
+
+def speed_perturb(clips, lengths, rng, speed_range=SPEED_RANGE):
+    """Doğrusal enterpolasyonla yeniden örnekleyerek hız (perde + tempo) değiştirir."""
+    lengths = np.asarray(lengths)
+    rates = rng.uniform(*speed_range, size=len(clips))
+    new_lengths = np.maximum(1, np.floor((lengths - 1) / rates).astype(np.int64) + 1)
+    positions = np.arange(new_lengths.max(initial=1))[np.newaxis, :] * rates[:, np.newaxis]
+    left = np.minimum(np.floor(positions).astype(np.int64), clips.shape[1] - 1)
+    right = np.minimum(left + 1, clips.shape[1] - 1)
+    frac = (positions - left).astype(np.float32)
+    out = (np.take_along_axis(clips, left, axis=1) * (1 - frac) +
+           np.take_along_axis(clips, right, axis=1) * frac)
+    out[~_valid_mask(out, new_lengths)] = 0
+    return out.astype(np.float32), new_lengths
+
+def add_noise(clips, lengths, rng, snr_db=NOISE_SNR_DB):
+    """Her klibe kendi gücüne göre rastgele SNR'de beyaz gürültü ekler."""
+    mask = _valid_mask(clips, lengths)
+    power = np.sum(clips ** 2, axis=1) / np.maximum(np.asarray(lengths), 1)
+    snr = rng.uniform(*snr_db, size=len(clips))
+    scale = np.sqrt(power / 10 ** (snr / 10))[:, np.newaxis]
+    noise = rng.standard_normal(clips.shape, dtype=np.float32) * scale
+    return np.where(mask, clips + noise, 0).astype(np.float32), lengths
+
+def random_gain(clips, lengths, rng, gain_db=GAIN_DB):
+    """Her klibi rastgele bir kazançla ölçekler."""
+    gains = 10 ** (rng.uniform(*gain_db, size=len(clips)) / 20)
+    return (clips * gains[:, np.newaxis]).astype(np.float32), lengths
+
+def time_shift(clips, lengths, rng, max_shift=MAX_SHIFT):
+    """Klipleri kendi uzunlukları içinde rastgele kaydırır; boşalan kısım sıfırla doldurulur."""
+    mask = _valid_mask(clips, lengths)
+    shifts = rng.integers(-max_shift, max_shift + 1, size=len(clips))
+    source = np.arange(clips.shape[1])[np.newaxis, :] - shifts[:, np.newaxis]
+    inside = mask & (source >= 0) & (source < np.asarray(lengths)[:, np.newaxis])
+    out = np.take_along_axis(clips, np.clip(source, 0, clips.shape[1] - 1), axis=1)
+    return np.where(inside, out, 0).astype(np.float32), lengths
+
+def spec_augment(features, rng, freq_mask=FREQ_MASK, time_mask=TIME_MASK):
+    """Her örneğe birer rastgele frekans ve zaman maskesi uygular; (N, n_mfcc, çerçeve[, 1]) kabul eder."""
+    n, n_mfcc, n_frames = features.shape[:3]
+    f_width = rng.integers(0, freq_mask + 1, size=n)
+    f_start = rng.integers(0, np.maximum(n_mfcc - f_width, 0) + 1)
+    t_width = rng.integers(0, time_mask + 1, size=n)
+    t_start = rng.integers(0, np.maximum(n_frames - t_width, 0) + 1)
+    rows = np.arange(n_mfcc)[np.newaxis, :]
+    cols = np.arange(n_frames)[np.newaxis, :]
+    f_masked = (rows >= f_start[:, np.newaxis]) & (rows < (f_start + f_width)[:, np.newaxis])
+    t_masked = (cols >= t_start[:, np.newaxis]) & (cols < (t_start + t_width)[:, np.newaxis])
+    masked = f_masked[:, :, np.newaxis] | t_masked[:, np.newaxis, :]
+    if features.ndim == 4:
+        masked = masked[..., np.newaxis]
+    return np.where(masked, 0, features).astype(features.dtype)
+
+_WAVEFORM_FUNCTIONS = {
+    'speed': speed_perturb,
+    'noise': add_noise,
+    'gain': random_gain,
+    'shift': time_shift,
+}
+
+def augment_batch(name, clips, lengths, rng, setting=None):
+    """
+    Adı verilen dalga formu arttırmasını yığına uygular; (klipler, uzunluklar) döndürür.
+    setting, arttırmanın aralığıdır (ör. speed için speed_range); None ise modül varsayılanı kullanılır.
+    """
+    function = _WAVEFORM_FUNCTIONS[name]
+    clips, lengths = np.asarray(clips, dtype=np.float32), np.asarray(lengths)
+    if setting is None:
+        return function(clips, lengths, rng)
+    return function(clips, lengths, rng, setting)
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Toplu değerlendirme: binlerce kaydı tek süreçte, model bir kez yüklenerek sınıflandırır.
+Kod çözme ve MFCC çıkarımı bir işçi süreç havuzunda yapılırken çıkarım büyük yığınlarla
+ana süreçte çalışır. Dosya başına tahminler, karışıklık matrisi ve sınıf başına doğruluk üretilir.
+
+Girdiler (birden fazla verilebilir):
+  - Komut alt klasörlü dizin (data/<komut>/*.wav; etiket klasör adından alınır)
+  - Korpus dizini (index.json içeren) ya da tek kayıt için 'korpus::komut/dosya.wav'
+  - Manifest (.csv/.tsv/.txt): satır başına 'yol[,etiket]'; göreli yollar manifeste göredir
+
+Ön işleme modele göre seçilir (--preset): 'professional' normalize edilmiş MFCC ile
+sound_command_model_cpu_professional.h5, 'sing' normalize edilmemiş MFCC ile
+sound_command_model_cpu.h5 kullanır. Model paketi (sweep.py çıktısı) verilirse MFCC
+ayarları ve komut listesi paketten okunur.
+
+Kullanım: python batch_evaluate.py data --preset sing --out tahminler.csv --report rapor.json
+"""
+
+import os
+import argparse
+import csv
+import json
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from feature_engine import SR, COMMANDS, MfccEngine
+from corpus import open_corpus, load_audio, SEPARATOR, INDEX_FILE
+
+MODEL_PRESETS = {
+    'professional': 'sound_command_model_cpu_professional.h5',
+    'sing': 'sound_command_model_cpu.h5',
+}
+AUDIO_EXTENSIONS = ('.wav', '.flac', '.ogg', '.mp3')
+MANIFEST_EXTENSIONS = ('.csv', '.tsv', '.txt')
+BATCH_SIZE = 256  # Çıkarım yığını
+CHUNK_SIZE = 64  # İşçi süreçlere bir seferde verilen dosya sayısı
+
+def _label_index(label):
+    return COMMANDS.index(label) if label in COMMANDS else None
+
+def list_directory(path):
+    """Dizindeki ses dosyalarını özyinelemeli listeler; üst klasör bir komutsa etiket olarak kullanılır."""
+    items = []
+    for root, dirs, files in os.walk(path):
+        dirs.sort()
+        for filename in sorted(files):
+            if filename.lower().endswith(AUDIO_EXTENSIONS):
+                items.append((os.path.join(root, filename), _label_index(os.path.basename(root))))
+    return items
+
+def list_corpus(corpus_path):
+    corpus = open_corpus(corpus_path)
+    return [(corpus_path + SEPARATOR + entry['path'], _label_index(entry['command'])) for entry in corpus.entries]
+
+def list_manifest(path):
+    """'yol[,etiket]' satırlarını okur; '#' ile başlayan satırlar ve başlık satırı atlanır."""
+    base = os.path.dirname(os.path.abspath(path))
+    delimiter = '\t' if path.endswith('.tsv') else ','
+    items = []
+    with open(path, encoding='utf-8', newline='') as f:
+        for row in csv.reader(f, delimiter=delimiter):
+            if not row or row[0].startswith('#') or row[0] == 'path':
+                continue
+            source = row[0].strip()
+            if SEPARATOR not in source and not os.path.isabs(source):
+                source = os.path.join(base, source)
+            label = row[1].strip() if len(row) > 1 else None
+            if label and label not in COMMANDS:
+                logging.warning("Bilinmeyen etiket '%s' (%s); etiketsiz sayılıyor", label, source)
+            items.append((source, _label_index(label)))
+    return items
+
+def collect_inputs(sources):
+    """Tüm girdileri (kaynak, etiket indeksi ya da None) listesine dönüştürür."""
+    items = []
+    for source in sources:
+        if SEPARATOR in source:
+            path = source.split(SEPARATOR, 1)[1]
+            items.append((source, _label_index(path.split('/')[0])))
+        elif os.path.isdir(source) and os.path.exists(os.path.join(source, INDEX_FILE)):
+            items += list_corpus(source)
+        elif os.path.isdir(source):
+            items += list_directory(source)
+        elif source.lower().endswith(MANIFEST_EXTENSIONS):
+            items += list_manifest(source)
+        else:
+            items.append((source, None))
+    return items
+
+_engine = None
+
+def _init_worker(engine_config):
+    global _engine
+    _engine = MfccEngine(**engine_config)
+
+def _features_chunk(paths):
+    """
+    İşçi süreçte bir grup dosyayı çözer ve tek bir toplu MFCC çağrısıyla özelliklerini çıkarır.
+    Okunamayan dosyalar için özellik yerine hata mesajı döndürülür.
+    """
+    clips, ok, errors = [], [], {}
+    for i, path in enumerate(paths):
+        try:
+            clips.append(load_audio(path, sr=SR)[0])
+            ok.append(i)
+        except Exception as e:
+            errors[i] = str(e)
+    features = (_engine.batch(clips) if clips else
+                np.zeros((0, _engine.n_mfcc, _engine.max_pad_len, 1), dtype=np.float32))
+    return features, ok, errors
+
+def iter_features(paths, engine_config, workers):
+    """Dosya grupları için (indeksler, özellikler, hatalar) üretir; workers > 1 ise süreç havuzu kullanılır."""
+    chunks = [paths[i:i + CHUNK_SIZE] for i in range(0, len(paths), CHUNK_SIZE)]
+    offsets = range(0, len(paths), CHUNK_SIZE)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(engine_config,)) as executor:
+            for offset, (features, ok, errors) in zip(offsets, executor.map(_features_chunk, chunks)):
+                yield offset, features, ok, errors
+    else:
+        _init_worker(engine_config)
+        for offset, chunk in zip(offsets, chunks):
+            yield (offset,) + _features_chunk(chunk)
+
+def evaluate(model, items, engine, workers=1, batch_size=BATCH_SIZE):
+    """
+    Tüm girdileri modelin MfccEngine'i ile sınıflandırır. Dosya başına sonuç sözlüklerinin listesini döndürür;
+    çözülemeyen dosyalar 'error' alanıyla işaretlenir.
+    """
+    paths = [source for source, _ in items]
+    results = [None] * len(items)
+    pending_idx, pending_feats = [], []
+
+    def run_batch():
+        probs = np.asarray(model.predict(np.concatenate(pending_feats), batch_size=batch_size, verbose=0))
+        for idx, p in zip(pending_idx, probs):
+            pred = int(np.argmax(p))
+            results[idx] = {'path': paths[idx], 'label': items[idx][1], 'prediction': pred,
+                            'confidence': float(p[pred]), 'error': None}
+        pending_idx.clear()
+        pending_feats.clear()
+
+    done = 0
+    for offset, features, ok, errors in iter_features(paths, engine.config(), workers):
+        for i, message in errors.items():
+            logging.warning("Okunamadı: %s (%s)", paths[offset + i], message)
+            results[offset + i] = {'path': paths[offset + i], 'label': items[offset + i][1], 'prediction': None,
+                                   'confidence': None, 'error': message}
+        pending_idx.extend(offset + i for i in ok)
+        pending_feats.append(features)
+        # İşçiler sonraki grupları hazırlarken çıkarım büyük yığınlar halinde yapılır
+        if len(pending_idx) >= batch_size:
+            run_batch()
+        done += len(ok) + len(errors)
+        logging.info("%d/%d dosya işlendi", done, len(paths))
+    if pending_idx:
+        run_batch()
+    return results
+
+def confusion_matrix(results, num_classes=len(COMMANDS)):
+    """Satırlar gerçek, sütunlar tahmin edilen sınıflar olan karışıklık matrisi (etiketli dosyalar)."""
+    matrix = np.zeros((num_classes, num_classes), dtype=np.int64)
+    for r in results:
+        if r['label'] is not None and r['prediction'] is not None:
+            matrix[r['label'], r['prediction']] += 1
+    return matrix
+
+def format_report(matrix):
+    width = max(len(c) for c in COMMANDS) + 2
+    lines = ["Karışıklık matrisi (satır: gerçek, sütun: tahmin)",
+             ' ' * width + ''.join('%6d' % i for i in range(len(COMMANDS)))]
+    for i, command in enumerate(COMMANDS):
+        lines.append('%-*s' % (width, '%d %s' % (i, command)) + ''.join('%6d' % v for v in matrix[i]))
+    lines.append("")
+    lines.append("Sınıf başına doğruluk:")
+    for i, command in enumerate(COMMANDS):
+        total = matrix[i].sum()
+        lines.append("  %-*s %6.2f%%  (%d/%d)" % (width, command, 100.0 * matrix[i, i] / total if total else 0.0,
+                                                matrix[i, i], total))
+    total = matrix.sum()
+    lines.append("Genel doğruluk: %.2f%% (%d/%d)" % (100.0 * np.trace(matrix) / total if total else 0.0,
+                                                     np.trace(matrix), total))
+    return '\n'.join(lines)
+
+def write_predictions(results, path):
+    """Dosya başına tahminleri CSV ya da (.jsonl uzantısıyla) JSON satırları olarak yazar."""
+    rows = [{
+        'path': r['path'],
+        'label': COMMANDS[r['label']] if r['label'] is not None else '',
+        'prediction': COMMANDS[r['prediction']] if r['prediction'] is not None else '',
+        'confidence': r['confidence'] if r['confidence'] is not None else '',
+        'error': r['error'] or '',
+    } for r in results]
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if path.endswith('.jsonl'):
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + '\n')
+        else:
+            writer = csv.DictWriter(f, fieldnames=['path', 'label', 'prediction', 'confidence', 'error'])
+            writer.writeheader()
+            writer.writerows(rows)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Dizin, korpus ya da manifestlerdeki kayıtları toplu değerlendirir.")
+    parser.add_argument('inputs', nargs='+', help="Dizin, korpus, manifest ya da tek dosya")
+    parser.add_argument('--preset', choices=sorted(MODEL_PRESETS), default='professional',
+                        help="Modelin eğitildiği ön işleme (MFCC normalizasyonu) ve varsayılan model dosyası")
+    parser.add_argument('--model', help="Model dosyası (.h5/.tflite), model paketi ya da sunucu adresi; "
+                                        "varsayılan ön ayarın modeli")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Kod çözme ve özellik çıkarımı için işçi süreç sayısı")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Çıkarım yığın boyutu")
+    parser.add_argument('--out', help="Dosya başına tahminlerin yazılacağı .csv ya da .jsonl dosyası")
+    parser.add_argument('--report', help="Karışıklık matrisi ve doğrulukların yazılacağı JSON dosyası")
+    return parser.parse_args()
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    global COMMANDS
+    args = parse_args()
+    model_path = args.model or MODEL_PRESETS[args.preset]
+    from inference_backend import load_bundle
+    model, engine, commands = load_bundle(model_path, preset=args.preset)
+    COMMANDS = commands or COMMANDS
+    items = collect_inputs(args.inputs)
+    if not items:
+        raise SystemExit("Değerlendirilecek kayıt bulunamadı.")
+    logging.info("%d kayıt, ön ayar '%s', model %s", len(items), args.preset, model_path)
+
+    start = time.perf_counter()
+    results = evaluate(model, items, engine, args.workers, args.batch_size)
+    elapsed = time.perf_counter() - start
+    failed = sum(r['error'] is not None for r in results)
+    logging.info("%d kayıt %.1f saniyede değerlendirildi (%.0f kayıt/s, %d hata)",
+                 len(results), elapsed, len(results) / elapsed if elapsed else 0.0, failed)
+
+    if args.out:
+        write_predictions(results, args.out)
+        logging.info("Tahminler kaydedildi: %s", args.out)
+    matrix = confusion_matrix(results, len(COMMANDS))
+    if matrix.sum():
+        print(format_report(matrix))
+    else:
+        logging.info("Etiketli kayıt yok; yalnızca tahminler üretildi.")
+    if args.report:
+        per_class = {command: (float(matrix[i, i] / matrix[i].sum()) if matrix[i].sum() else None)
+                     for i, command in enumerate(COMMANDS)}
+        report = {
+            'model': model_path,
+            'preset': args.preset,
+            'files': len(results),
+            'errors': failed,
+            'labeled': int(matrix.sum()),
+            'accuracy': float(np.trace(matrix) / matrix.sum()) if matrix.sum() else None,
+            'per_class_accuracy': per_class,
+            'commands': COMMANDS,
+            'confusion_matrix': matrix.tolist(),
+        }
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        logging.info("Rapor kaydedildi: %s", args.report)
+
+if __name__ == '__main__':
+    main()
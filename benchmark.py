@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Uçtan uca gecikme ölçümü: konuşmanın bitişinden komut baytının seri porta yazılmasına kadar
+her aşamanın süresini çevrimdışı ölçer. Betiklerin kendi fonksiyonları çalıştırılır; içe
+aktarılmadan önce sys.modules'a sounddevice ve keyboard yerine donanımsız taklit modüller
+konur. Ses taklit mikrofondan (sentetik ya da verilen WAV dosyaları) gelir; seri port
+pyserial 'loop://' adresidir.
+
+Ölçülen boru hatları:
+  python_kod                      ses_tanima_ve_gonder: VAD ile kayıt, özellik, çıkarım, seri gönderim
+  realTimeTest                    start_recording/stop_recording: SPACE bırakıldıktan sonra segmentasyon,
+                                  toplu özellik/çıkarım ve tahminlerin seri gönderimi
+  test_model_professional         predict_commands: dosya yükleme, segmentasyon, toplu özellik/çıkarım
+  test_model_professional_stream  stream_commands: blok blok okuma ve artımlı segmentasyon
+
+Aşama süreleri betiklerin metrics zamanlayıcılarından okunur; 'endpoint' (konuşma bitişinden
+kayıt kararına) ve 'total' benchmark tarafından ölçülür. Taklit mikrofon blokları varsayılan
+olarak gerçek zaman hızında verir; --fast ile bloklar beklemeden gelir ve yakalama süreleri
+sentetik olarak işaretlenir. Her aşama için p50/p95/p99 gecikme ve komut/saniye verimi
+yazdırılır; --out ile JSON olarak kaydedilerek commit'ler arasında gerilemeler karşılaştırılabilir.
+
+Kullanım: python benchmark.py --model sound_command_model_cpu_professional.h5 --out bench.json
+"""
+
+import os
+import sys
+import argparse
+import io
+import json
+import logging
+import subprocess
+import tempfile
+import threading
+import time
+import types
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime
+import numpy as np
+import librosa
+from feature_engine import SR, DEFAULT_ENGINE
+from serial_transport import SerialTransport
+from corpus import load_audio
+import metrics
+
+DEFAULT_BLOCKSIZE = 512  # blocksize verilmeyen akışlar için blok boyutu
+SERIAL_TIMEOUT = 2.0  # Seri gönderimin tamamlanması için beklenen en uzun süre (saniye)
+VARIANTS = ('python_kod', 'realTimeTest', 'test_model_professional', 'test_model_professional_stream')
+
+class StageTimer:
+    """Aşama adına göre süre örneklerini toplar."""
+
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, stage, seconds):
+        self.samples.setdefault(stage, []).append(seconds)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        yield
+        self.add(name, time.perf_counter() - start)
+
+    def add_registry(self, registry=metrics.REGISTRY):
+        """Betiklerin metrics zamanlayıcılarıyla ölçtüğü aşamaları ekler (aşama başına son ölçümler)."""
+        for stage, histogram in registry.histograms.items():
+            self.samples.setdefault(stage, []).extend(histogram.recent)
+
+    def summary(self):
+        """Her aşama için milisaniye cinsinden yüzdelikler."""
+        result = {}
+        for stage, values in self.samples.items():
+            ms = np.asarray(values) * 1000
+            result[stage] = {
+                'n': len(ms),
+                'mean_ms': float(ms.mean()),
+                'p50_ms': float(np.percentile(ms, 50)),
+                'p95_ms': float(np.percentile(ms, 95)),
+                'p99_ms': float(np.percentile(ms, 99)),
+            }
+        return result
+
+class StubInputStream:
+    """
+    sounddevice.InputStream yerine geçen akış: klibi blocksize'lık bloklar halinde callback'e
+    verir, klip bitince durdurulana kadar sessizlik vermeye devam eder. realtime=True ise klip
+    gerçek zaman hızında gelir; sonrasındaki sessizlik her zaman gerçek zaman hızındadır.
+    speech_end örneğini içeren blok teslim edildiğinde speech_end_at zamanı kaydedilir.
+    """
+
+    def __init__(self, audio, samplerate, blocksize, callback, speech_end=None, realtime=True):
+        self.audio = np.asarray(audio, dtype=np.float32)
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.callback = callback
+        self.speech_end = len(self.audio) if speech_end is None else speech_end
+        self.realtime = realtime
+        self.speech_end_at = None
+        self.clip_done = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        start = time.perf_counter()
+        offset = 0
+        paced = self.realtime
+        silence = np.zeros(self.blocksize, dtype=np.float32)
+        while not self._stop.is_set():
+            in_clip = offset < len(self.audio)
+            if not in_clip and not paced:
+                # Klip beklemeden verildi; ardından gelen sessizlik şimdiden itibaren gerçek zamanlıdır
+                paced, start = True, time.perf_counter() - offset / self.samplerate
+            if paced:
+                delay = start + offset / self.samplerate - time.perf_counter()
+                if delay > 0 and self._stop.wait(delay):
+                    break
+            block = self.audio[offset:offset + self.blocksize] if in_clip else silence
+            self.callback(block[:, np.newaxis], len(block), None, None)
+            offset += len(block)
+            if self.speech_end_at is None and offset >= self.speech_end:
+                self.speech_end_at = time.perf_counter()
+            if offset >= len(self.audio):
+                self.clip_done.set()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def close(self):
+        self.stop()
+
+    def wait(self):
+        """Klibin tamamı teslim edilene kadar bekler."""
+        self.clip_done.wait()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+class StubMicrophone:
+    """Taklit sounddevice modülünün InputStream'i: her yeni akış sıradaki klibi çalar."""
+
+    def __init__(self, realtime=True):
+        self.realtime = realtime
+        self.clip = np.zeros(0, dtype=np.float32)
+        self.speech_end = None
+        self.stream = None
+
+    def play(self, audio, speech_end=None):
+        self.clip, self.speech_end = audio, speech_end
+
+    def InputStream(self, samplerate=SR, channels=1, callback=None, blocksize=0, **kwargs):
+        self.stream = StubInputStream(self.clip, samplerate, blocksize or DEFAULT_BLOCKSIZE, callback,
+                                      self.speech_end, self.realtime)
+        return self.stream
+
+def install_stubs(microphone):
+    """sounddevice ve keyboard yerine taklit modülleri kurar; betikler bundan sonra içe aktarılmalı."""
+    sounddevice = types.ModuleType('sounddevice')
+    sounddevice.InputStream = microphone.InputStream
+    keyboard = types.ModuleType('keyboard')
+    keyboard.on_press_key = keyboard.on_release_key = lambda *args, **kwargs: None
+    keyboard.unhook_all = lambda: None
+    sys.modules['sounddevice'] = sounddevice
+    sys.modules['keyboard'] = keyboard
+
+class NullWidget:
+    """python_kod arayüz etiketlerinin yerine geçer; pencere açılmadan güncellemeler yutulur."""
+
+    def config(self, **kwargs):
+        pass
+
+def synth_command(rng, duration):
+    """Konuşmaya benzeyen sentetik bir komut: genlik zarflı armonik ton ve az gürültü."""
+    t = np.arange(int(duration * SR)) / SR
+    f0 = rng.uniform(110, 260)
+    tone = sum(np.sin(2 * np.pi * f0 * k * t + rng.uniform(0, np.pi)) / k for k in range(1, 6))
+    envelope = np.hanning(len(t)) ** 0.5
+    return (0.2 * tone * envelope + 0.003 * rng.standard_normal(len(t))).astype(np.float32)
+
+def silence(rng, duration):
+    return (0.001 * rng.standard_normal(int(duration * SR))).astype(np.float32)
+
+def make_inputs(args):
+    """Tek komutluk klipleri (ses, konuşma bitişi) ve çok komutlu klipleri üretir."""
+    import realTimeTest
+    rng = np.random.default_rng(args.seed)
+    singles, multis = [], []
+    if args.wav:
+        for path in args.wav:
+            audio, _ = load_audio(path, sr=SR)
+            audio = np.concatenate([silence(rng, 0.3), audio, silence(rng, 0.6)])
+            intervals = librosa.effects.split(audio, top_db=realTimeTest.SILENCE_TOP_DB)
+            end = int(intervals[-1][1]) if len(intervals) else len(audio)
+            singles.append((audio, end))
+            multis.append((audio, end))
+        return singles, multis
+    for _ in range(args.iterations):
+        command = synth_command(rng, rng.uniform(0.3, 0.7))
+        audio = np.concatenate([silence(rng, 0.3), command, silence(rng, 0.6)])
+        singles.append((audio, int(0.3 * SR) + len(command)))
+        parts = [silence(rng, 0.3)]
+        for _ in range(args.segments):
+            parts += [synth_command(rng, rng.uniform(0.3, 0.6)), silence(rng, 0.3)]
+        audio = np.concatenate(parts)
+        multis.append((audio, len(audio) - int(0.3 * SR)))
+    return singles, multis
+
+class SerialProbe:
+    """loop:// üzerinde SerialTransport; gönderimin yazılıp bittiği anı yakalar, zaman aşımlarını sayar."""
+
+    def __init__(self):
+        self._sent = threading.Event()
+        self.sent_at = None
+        self.timeouts = 0
+        self.transport = SerialTransport(on_sent=self._on_sent)
+        self.transport.open('loop://')
+
+    def _on_sent(self, record):
+        if record is not None:
+            self.sent_at = time.perf_counter()
+            self._sent.set()
+
+    def expect(self):
+        """Bir sonraki gönderimi beklemeye hazırlanır (gönderimden önce çağrılır)."""
+        self._sent.clear()
+
+    def wait(self, timeout=SERIAL_TIMEOUT):
+        """Gönderimin bittiği perf_counter zamanını, zaman aşımında None döndürür."""
+        sent = self._sent.wait(timeout)
+        # loop:// tamponu boşaltılır ki sınırsız büyümesin
+        ser = self.transport._serial
+        if ser is not None and ser.in_waiting:
+            ser.read(ser.in_waiting)
+        if not sent:
+            self.timeouts += 1
+            return None
+        return self.sent_at
+
+    def send(self, code):
+        self.expect()
+        self.transport.send(code)
+        return self.wait()
+
+    def close(self):
+        self.transport.close()
+
+def bench_python_kod(model, engine, commands, singles, microphone, serial_probe):
+    """python_kod.ses_tanima_ve_gonder: VAD'li kayıt, özellik, çıkarım ve seri gönderim."""
+    import python_kod
+    python_kod.model, python_kod.ozellik_motoru = model, engine
+    python_kod.labels = commands or python_kod.labels
+    python_kod.tasiyici = serial_probe.transport
+    python_kod.etiket = python_kod.son_karakter_etiketi = NullWidget()
+    python_kod.log_yaz = logging.debug
+    timer = StageTimer()
+    sent = 0
+    start = time.perf_counter()
+    for audio, speech_end in singles:
+        microphone.play(audio, speech_end)
+        serial_probe.expect()
+        called_at = time.perf_counter()
+        before = metrics.REGISTRY.counters.get('commands', 0)
+        python_kod.ses_tanima_ve_gonder()
+        if metrics.REGISTRY.counters.get('commands', 0) == before:
+            continue  # Konuşma algılanmadı; gönderim yok
+        speech_end_at = microphone.stream.speech_end_at
+        # Konuşmanın bitişinden uç nokta kararına kadar geçen süre (hangover dahil)
+        timer.add('endpoint', called_at + metrics.last('capture') - speech_end_at)
+        sent_at = serial_probe.wait()
+        if sent_at is not None:
+            timer.add('total', sent_at - speech_end_at)
+            sent += 1
+    timer.add_registry()
+    return timer, sent, time.perf_counter() - start
+
+def bench_realtime_test(model, engine, commands, multis, microphone, serial_probe):
+    """realTimeTest: SPACE klip boyunca basılı, bırakıldıktan sonra işleme ve tahminlerin seri gönderimi."""
+    import python_kod
+    import realTimeTest
+    realTimeTest.model, realTimeTest.engine = model, engine
+    realTimeTest.COMMANDS = commands or realTimeTest.COMMANDS
+    timer = StageTimer()
+    sent = 0
+    start = time.perf_counter()
+    for audio, speech_end in multis:
+        microphone.play(audio, speech_end)
+        realTimeTest.start_recording()
+        realTimeTest.stream.wait()
+        released = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            predictions = realTimeTest.stop_recording()
+        last_sent = None
+        with timer.stage('serial'):
+            for command in predictions:
+                sent_at = serial_probe.send(python_kod.komut_kodlari[command])
+                if sent_at is not None:
+                    last_sent = sent_at
+                    sent += 1
+        if last_sent is not None:
+            # SPACE bırakılmasından son komut baytının yazılmasına kadar (0.5 s ek kayıt dahil)
+            timer.add('total', last_sent - released)
+    timer.add_registry()
+    return timer, sent, time.perf_counter() - start
+
+def bench_file_mode(model, engine, commands, multis, stream=False):
+    """test_model_professional.predict_commands (ya da stream_commands) ile dosya modu."""
+    import soundfile as sf
+    import test_model_professional
+    test_model_professional.COMMANDS = commands or test_model_professional.COMMANDS
+    timer = StageTimer()
+    found = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i, (audio, _) in enumerate(multis):
+            path = os.path.join(tmp, 'clip_%04d.wav' % i)
+            sf.write(path, audio, SR)
+            paths.append(path)
+        start = time.perf_counter()
+        for path in paths:
+            with timer.stage('total'):
+                if stream:
+                    predictions = list(test_model_professional.stream_commands(model, path, engine=engine))
+                else:
+                    predictions = test_model_professional.predict_commands(model, path, engine)
+            found += len(predictions)
+        elapsed = time.perf_counter() - start
+    timer.add_registry()
+    return timer, found, elapsed
+
+def load_benchmark_model(args):
+    """(model, MfccEngine, komutlar); --untrained ile eğitilmemiş aynı mimari kullanılır."""
+    if args.untrained:
+        import realTimeTest
+        from train_model import build_model
+        engine = DEFAULT_ENGINE
+        return build_model((engine.n_mfcc, engine.max_pad_len, 1), len(realTimeTest.COMMANDS)), engine, None
+    from inference_backend import load_bundle
+    return load_bundle(args.model)
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Yakalamadan seri porta uçtan uca gecikme ölçümü.")
+    parser.add_argument('--model', default='sound_command_model_cpu_professional.h5',
+                        help="Model dosyası (.h5/.tflite), model paketi ya da çıkarım sunucusu adresi")
+    parser.add_argument('--untrained', action='store_true', help="Model dosyası yerine eğitilmemiş modeli kullan")
+    parser.add_argument('--wav', nargs='*', help="Sentetik ses yerine kullanılacak kayıtlar")
+    parser.add_argument('--iterations', type=int, default=20, help="Sentetik klip sayısı")
+    parser.add_argument('--segments', type=int, default=5, help="Çok komutlu kliplerdeki komut sayısı")
+    parser.add_argument('--variants', default=','.join(VARIANTS), help="Ölçülecek boru hatları")
+    parser.add_argument('--fast', action='store_true',
+                        help="Taklit mikrofon klipleri beklemeden versin (yakalama süreleri sentetik olur)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help="Sonuçların yazılacağı JSON dosyası")
+    return parser.parse_args()
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args = parse_args()
+    microphone = StubMicrophone(realtime=not args.fast)
+    install_stubs(microphone)
+    import realTimeTest
+
+    model, engine, commands = load_benchmark_model(args)
+    # Isınma: graf izleme ve librosa'nın JIT derleme maliyeti ölçümlere karışmasın
+    model.predict_on_batch(engine.batch([np.zeros(SR, dtype=np.float32)]))
+    librosa.effects.split(np.zeros(SR, dtype=np.float32), top_db=realTimeTest.SILENCE_TOP_DB)
+    singles, multis = make_inputs(args)
+    serial_probe = SerialProbe()
+
+    results = {}
+    try:
+        for variant in args.variants.split(','):
+            logging.info("Ölçülüyor: %s", variant)
+            metrics.REGISTRY.reset()
+            timeouts = serial_probe.timeouts
+            if variant == 'python_kod':
+                timer, commands_done, elapsed = bench_python_kod(model, engine, commands, singles,
+                                                                 microphone, serial_probe)
+            elif variant == 'realTimeTest':
+                timer, commands_done, elapsed = bench_realtime_test(model, engine, commands, multis,
+                                                                    microphone, serial_probe)
+            elif variant in ('test_model_professional', 'test_model_professional_stream'):
+                timer, commands_done, elapsed = bench_file_mode(model, engine, commands, multis,
+                                                                stream=variant.endswith('_stream'))
+            else:
+                raise SystemExit("Bilinmeyen boru hattı: %s" % variant)
+            results[variant] = {
+                'commands': commands_done,
+                'elapsed_s': elapsed,
+                'throughput_cmd_per_s': commands_done / elapsed if elapsed else 0.0,
+                'serial_timeouts': serial_probe.timeouts - timeouts,
+                'stages': timer.summary(),
+            }
+    finally:
+        serial_probe.close()
+
+    for variant, result in results.items():
+        print("\n%s: %d komut, %.1f komut/s, %d seri zaman aşımı" % (
+            variant, result['commands'], result['throughput_cmd_per_s'], result['serial_timeouts']))
+        print("  %-18s %9s %9s %9s" % ('aşama', 'p50 ms', 'p95 ms', 'p99 ms'))
+        for stage, stats in result['stages'].items():
+            print("  %-18s %9.2f %9.2f %9.2f" % (stage, stats['p50_ms'], stats['p95_ms'], stats['p99_ms']))
+    if args.fast:
+        print("\nNot: --fast ile bloklar beklemeden verildi; capture, endpoint ve total süreleri sentetiktir.")
+
+    if args.out:
+        report = {
+            'commit': git_commit(),
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'config': vars(args),
+            'capture_synthetic': args.fast,
+            'variants': results,
+        }
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        logging.info("Sonuçlar kaydedildi: %s", args.out)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Önceden çözülmüş ses korpusu. data/<komut>/*.wav dosyaları bir kez 16 kHz'e çözülüp
+int16 ham parçalara (shard) yazılır; index.json her kaydın parça, ofset, uzunluk ve etiket
+bilgisini tutar. Parçalar bellek eşlemeli okunduğu için her kayıt kopyasız dilimlenir.
+Yeni kayıtlar mevcut parçaların sonuna eklenir; yeniden paketleme yalnızca yeni ya da
+değişmiş dosyaları çözer.
+
+Kullanım: python corpus.py --data data --out corpus
+Değerlendirme betiklerinde korpustaki bir kayıt 'corpus::dur/kayit1.wav' biçiminde verilebilir.
+"""
+
+import os
+import argparse
+import json
+import logging
+import numpy as np
+from feature_engine import SR, COMMANDS
+
+DATA_PATH = 'data'
+CORPUS_PATH = 'corpus'
+INDEX_FILE = 'index.json'
+SHARD_SAMPLES = 64 * 1024 * 1024  # Parça başına en fazla örnek (int16 ile 128 MB)
+SEPARATOR = '::'  # 'korpus::kayıt' biçimli kaynak adlarında ayraç
+FORMAT_VERSION = 1
+
+def _shard_name(number):
+    return 'shard_%05d.pcm' % number
+
+def _to_int16(audio):
+    return np.clip(np.round(np.asarray(audio) * 32767), -32768, 32767).astype('<i2')
+
+class Corpus:
+    """Paketlenmiş korpusu okur; ses dilimleri parçaların bellek eşlemesinden alınır."""
+
+    def __init__(self, corpus_path=CORPUS_PATH):
+        self.corpus_path = corpus_path
+        with open(os.path.join(corpus_path, INDEX_FILE), encoding='utf-8') as f:
+            index = json.load(f)
+        if index['sr'] != SR:
+            raise ValueError("Korpus %d Hz, beklenen %d Hz" % (index['sr'], SR))
+        self.sr = index['sr']
+        self.commands = index['commands']
+        self.entries = index['entries']
+        self._positions = {entry['path']: i for i, entry in enumerate(self.entries)}
+        self._shards = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    @property
+    def labels(self):
+        """Her kaydın komut adı."""
+        return [entry['command'] for entry in self.entries]
+
+    def find(self, path):
+        """'komut/dosya.wav' biçimindeki kayıt adının indeksini döndürür."""
+        try:
+            return self._positions[path.replace(os.sep, '/')]
+        except KeyError:
+            raise KeyError("Korpusta kayıt yok: %s" % path) from None
+
+    def _shard(self, number):
+        if number not in self._shards:
+            path = os.path.join(self.corpus_path, _shard_name(number))
+            self._shards[number] = np.memmap(path, dtype='<i2', mode='r')
+        return self._shards[number]
+
+    def pcm(self, i):
+        """Kaydın int16 örneklerini kopyasız (bellek eşlemeli görünüm) döndürür."""
+        entry = self.entries[i]
+        return self._shard(entry['shard'])[entry['offset']:entry['offset'] + entry['length']]
+
+    def audio(self, i):
+        """Kaydı librosa.load çıktısı gibi float32 olarak döndürür."""
+        return self.pcm(i).astype(np.float32) / 32767
+
+_open_corpora = {}
+
+def open_corpus(corpus_path):
+    """Süreç başına bir kez açılan korpus nesnesini döndürür."""
+    if corpus_path not in _open_corpora:
+        _open_corpora[corpus_path] = Corpus(corpus_path)
+    return _open_corpora[corpus_path]
+
+def load_audio(source, sr=SR):
+    """
+    Dosya yolunu librosa ile, 'korpus::komut/dosya.wav' biçimindeki kaynağı ise korpustan
+    çözmeden okur. (ses, örnekleme hızı) döndürür.
+    """
+    if SEPARATOR in source:
+        corpus_path, path = source.split(SEPARATOR, 1)
+        corpus = open_corpus(corpus_path)
+        if sr != corpus.sr:
+            raise ValueError("Korpus %d Hz, istenen %d Hz" % (corpus.sr, sr))
+        return corpus.audio(corpus.find(path)), corpus.sr
+    import librosa
+    return librosa.load(source, sr=sr)
+
+def _write_index(corpus_path, index):
+    tmp_path = os.path.join(corpus_path, INDEX_FILE + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f)
+    os.replace(tmp_path, os.path.join(corpus_path, INDEX_FILE))
+
+def pack_corpus(data_path=DATA_PATH, corpus_path=CORPUS_PATH, commands=COMMANDS, rebuild=False):
+    """
+    Veri dizinini korpusa paketler. Mevcut korpusa yalnızca yeni ya da değişmiş (boyut veya
+    değiştirilme zamanı farklı) dosyalar eklenir; değişen kayıtların eski örnekleri parçada
+    ölü alan olarak kalır ve rebuild=True ile geri kazanılır.
+    """
+    import librosa
+    index_path = os.path.join(corpus_path, INDEX_FILE)
+    if rebuild and os.path.isdir(corpus_path):
+        for name in os.listdir(corpus_path):
+            if name.startswith('shard_') or name == INDEX_FILE:
+                os.remove(os.path.join(corpus_path, name))
+    os.makedirs(corpus_path, exist_ok=True)
+    if os.path.exists(index_path):
+        with open(index_path, encoding='utf-8') as f:
+            index = json.load(f)
+    else:
+        index = {'version': FORMAT_VERSION, 'sr': SR, 'commands': list(commands), 'entries': []}
+    positions = {entry['path']: i for i, entry in enumerate(index['entries'])}
+
+    shard = max([entry['shard'] for entry in index['entries']], default=0)
+    shard_path = os.path.join(corpus_path, _shard_name(shard))
+    added = 0
+    for command in commands:
+        if command not in index['commands']:
+            index['commands'].append(command)
+        folder = os.path.join(data_path, command)
+        if not os.path.isdir(folder):
+            logging.warning("'%s' komutu için klasör bulunamadı, atlanıyor: %s", command, folder)
+            continue
+        for filename in sorted(os.listdir(folder)):
+            if not filename.endswith('.wav'):
+                continue
+            file_path = os.path.join(folder, filename)
+            stat = os.stat(file_path)
+            path = command + '/' + filename
+            old = positions.get(path)
+            if old is not None and index['entries'][old]['size'] == stat.st_size \
+                    and index['entries'][old]['mtime'] == stat.st_mtime:
+                continue
+            pcm = _to_int16(librosa.load(file_path, sr=SR)[0])
+            # Ofset dizinden değil parçanın gerçek boyutundan alınır; yarım kalan ekleme zarar vermez
+            offset = os.path.getsize(shard_path) // 2 if os.path.exists(shard_path) else 0
+            if offset and offset + len(pcm) > SHARD_SAMPLES:
+                shard += 1
+                shard_path = os.path.join(corpus_path, _shard_name(shard))
+                offset = 0
+            with open(shard_path, 'ab') as f:
+                f.write(pcm.tobytes())
+            entry = {'path': path, 'command': command, 'shard': shard, 'offset': offset,
+                     'length': len(pcm), 'size': stat.st_size, 'mtime': stat.st_mtime}
+            if old is None:
+                positions[path] = len(index['entries'])
+                index['entries'].append(entry)
+            else:
+                index['entries'][old] = entry
+            added += 1
+    _write_index(corpus_path, index)
+    _open_corpora.pop(corpus_path, None)
+    logging.info("Korpus güncellendi: %d kayıt eklendi, toplam %d kayıt (%s)",
+                 added, len(index['entries']), corpus_path)
+    return added
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="data/<komut>/*.wav dosyalarını int16 korpusa paketler.")
+    parser.add_argument('--data', default=DATA_PATH, help="Komut alt klasörlerini içeren veri dizini")
+    parser.add_argument('--out', default=CORPUS_PATH, help="Korpus dizini")
+    parser.add_argument('--rebuild', action='store_true', help="Korpusu sıfırdan yeniden oluştur")
+    args = parser.parse_args()
+    pack_corpus(args.data, args.out, rebuild=args.rebuild)
+
+if __name__ == '__main__':
+    main()
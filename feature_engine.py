@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Ortak MFCC özellik motoru: eğitim, arayüz ve gerçek zamanlı tanıma aynı kodu kullanır.
+STFT penceresi, mel filtre bankası ve DCT matrisi bir kez hazırlanır; bir grup ses klibi
+tek bir vektörel geçişte normalize edilmiş ve pad'lenmiş (N, n_mfcc, max_pad_len, 1)
+tensörüne dönüştürülür. Sonuçlar librosa.feature.mfcc (librosa >= 0.10 varsayılanları)
+ile sayısal olarak eşleşir; doğrulamak için: python feature_engine.py [ses.wav ...]
+"""
+
+import sys
+import numpy as np
+
+# Parametreler (eğitim ayarlarıyla uyumlu olmalı)
+COMMANDS = ['dur', 'duz_devam_et', 'geri_don', 'sag_don', 'sola_don']  # Varsayılan etiket sırası; model paketleri kendi listesini taşır
+SR = 16000  # Örnekleme hızı
+N_MFCC = 40
+MAX_PAD_LEN = 44  # Eğitimde kullanılan uzunluk
+N_FFT = 2048
+HOP_LENGTH = 512
+N_MELS = 128
+TOP_DB = 80.0
+AMIN = 1e-10
+
+def hz_to_mel(freqs):
+    """Slaney mel ölçeği (librosa htk=False ile aynı)."""
+    freqs = np.asarray(freqs, dtype=np.float64)
+    f_sp = 200.0 / 3
+    mels = freqs / f_sp
+    min_log_hz = 1000.0
+    min_log_mel = min_log_hz / f_sp
+    logstep = np.log(6.4) / 27.0
+    log_t = freqs >= min_log_hz
+    mels = np.where(log_t, min_log_mel + np.log(np.maximum(freqs, min_log_hz) / min_log_hz) / logstep, mels)
+    return mels
+
+def mel_to_hz(mels):
+    """hz_to_mel fonksiyonunun tersi."""
+    mels = np.asarray(mels, dtype=np.float64)
+    f_sp = 200.0 / 3
+    freqs = f_sp * mels
+    min_log_hz = 1000.0
+    min_log_mel = min_log_hz / f_sp
+    logstep = np.log(6.4) / 27.0
+    log_t = mels >= min_log_mel
+    return np.where(log_t, min_log_hz * np.exp(logstep * (mels - min_log_mel)), freqs)
+
+def mel_filterbank(sr=SR, n_fft=N_FFT, n_mels=N_MELS):
+    """Slaney normalizasyonlu mel filtre bankası; şekil: (n_mels, 1 + n_fft // 2)."""
+    fftfreqs = np.fft.rfftfreq(n_fft, d=1.0 / sr)
+    mel_f = mel_to_hz(np.linspace(hz_to_mel(0.0), hz_to_mel(sr / 2.0), n_mels + 2))
+    fdiff = np.diff(mel_f)
+    ramps = np.subtract.outer(mel_f, fftfreqs)
+    lower = -ramps[:-2] / fdiff[:-1, np.newaxis]
+    upper = ramps[2:] / fdiff[1:, np.newaxis]
+    weights = np.maximum(0, np.minimum(lower, upper))
+    enorm = 2.0 / (mel_f[2:n_mels + 2] - mel_f[:n_mels])
+    return (weights * enorm[:, np.newaxis]).astype(np.float32)
+
+def dct_matrix(n_mfcc=N_MFCC, n_mels=N_MELS):
+    """Ortonormal DCT-II matrisinin ilk n_mfcc satırı; şekil: (n_mfcc, n_mels)."""
+    k = np.arange(n_mfcc)[:, np.newaxis]
+    n = np.arange(n_mels)[np.newaxis, :]
+    basis = np.cos(np.pi * k * (2 * n + 1) / (2.0 * n_mels)) * np.sqrt(2.0 / n_mels)
+    basis[0] /= np.sqrt(2.0)
+    return basis.astype(np.float32)
+
+class MfccEngine:
+    """Sabit bir yapılandırma için önceden hesaplanmış MFCC boru hattı."""
+
+    def __init__(self, sr=SR, n_mfcc=N_MFCC, max_pad_len=MAX_PAD_LEN, n_fft=N_FFT,
+                 hop_length=HOP_LENGTH, n_mels=N_MELS, normalize=True):
+        self.sr = sr
+        self.n_mfcc = n_mfcc
+        self.max_pad_len = max_pad_len
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.n_mels = n_mels
+        self.normalize = normalize
+        # Periyodik Hann penceresi (scipy.signal.get_window('hann', n_fft) ile aynı)
+        self.window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(n_fft) / n_fft)).astype(np.float32)
+        self.mel_basis_t = np.ascontiguousarray(mel_filterbank(sr, n_fft, n_mels).T)
+        self.dct_t = np.ascontiguousarray(dct_matrix(n_mfcc, n_mels).T)
+
+    def config(self):
+        """Motoru yeniden kurmaya yeten parametreler (MfccEngine(**config) ile); model paketlerine yazılır."""
+        return {'sr': self.sr, 'n_mfcc': self.n_mfcc, 'max_pad_len': self.max_pad_len, 'n_fft': self.n_fft,
+                'hop_length': self.hop_length, 'n_mels': self.n_mels, 'normalize': self.normalize}
+
+    def _as_batch(self, clips, lengths):
+        """Klip listesini sıfırla doldurulmuş (N, örnek) dizisine ve uzunluklara dönüştürür."""
+        if isinstance(clips, np.ndarray) and clips.ndim == 2:
+            batch = clips.astype(np.float32, copy=False)
+            if lengths is None:
+                lengths = np.full(len(batch), batch.shape[1])
+            return batch, np.asarray(lengths)
+        clips = [np.asarray(clip, dtype=np.float32).reshape(-1) for clip in clips]
+        lengths = np.array([len(clip) for clip in clips])
+        batch = np.zeros((len(clips), max(lengths.max(initial=0), 1)), dtype=np.float32)
+        for i, clip in enumerate(clips):
+            batch[i, :len(clip)] = clip
+        return batch, lengths
+
+    def mfcc(self, clips, lengths=None):
+        """
+        Ham (normalize edilmemiş) MFCC'leri ve geçerli çerçeve maskesini döndürür.
+        clips: eşit uzunlukta kliplerden oluşan 2 boyutlu dizi (lengths ile gerçek uzunluklar
+        verilebilir) ya da farklı uzunluklarda 1 boyutlu dizilerin listesi.
+        """
+        batch, lengths = self._as_batch(clips, lengths)
+        pad = self.n_fft // 2
+        # center=True, pad_mode='constant': iki uca sıfır eklenir
+        padded = np.pad(batch, ((0, 0), (pad, pad)))
+        frames = np.lib.stride_tricks.sliding_window_view(padded, self.n_fft, axis=-1)[:, ::self.hop_length]
+        spectrum = np.fft.rfft(frames * self.window, axis=-1)
+        power = (spectrum.real ** 2 + spectrum.imag ** 2).astype(np.float32)
+        mel = power @ self.mel_basis_t  # (N, çerçeve, n_mels)
+
+        # Pad'lenmiş kısımdan gelen çerçeveler maskelenir; kısa klipler librosa ile birebir aynı kalır
+        n_frames = 1 + lengths // self.hop_length
+        valid = np.arange(mel.shape[1])[np.newaxis, :] < n_frames[:, np.newaxis]
+        log_mel = 10.0 * np.log10(np.maximum(mel, AMIN))
+        peak = np.where(valid[..., np.newaxis], log_mel, -np.inf).max(axis=(1, 2), keepdims=True)
+        log_mel = np.maximum(log_mel, peak - TOP_DB)
+        mfcc = np.swapaxes(log_mel @ self.dct_t, 1, 2)  # (N, n_mfcc, çerçeve)
+        return mfcc, valid
+
+    def batch(self, clips, lengths=None):
+        """Klip grubunu modelin beklediği (N, n_mfcc, max_pad_len, 1) tensörüne dönüştürür."""
+        mfcc, valid = self.mfcc(clips, lengths)
+        mask = valid[:, np.newaxis, :]
+        if self.normalize:
+            count = valid.sum(axis=1)[:, np.newaxis, np.newaxis]
+            mean = np.where(mask, mfcc, 0).sum(axis=2, keepdims=True) / count
+            std = np.sqrt(np.where(mask, (mfcc - mean) ** 2, 0).sum(axis=2, keepdims=True) / count)
+            mfcc = (mfcc - mean) / (std + 1e-10)
+        mfcc = np.where(mask, mfcc, 0)
+        out = np.zeros((len(mfcc), self.n_mfcc, self.max_pad_len, 1), dtype=np.float32)
+        n = min(self.max_pad_len, mfcc.shape[2])
+        out[:, :, :n, 0] = mfcc[:, :, :n]
+        return out
+
+    def features(self, audio):
+        """Tek bir klip için (n_mfcc, max_pad_len) özellik matrisi döndürür."""
+        return self.batch([audio])[0, ..., 0]
+
+DEFAULT_ENGINE = MfccEngine()
+
+# Model başına ön işleme: her model eğitildiği MFCC yapılandırmasıyla çalıştırılmalıdır
+PRESETS = {
+    'professional': {'normalize': True},  # sound_command_model_cpu_professional.h5
+    'sing': {'normalize': False},  # sound_command_model_cpu.h5 (test_model_sing.py)
+}
+
+def engine_for(preset):
+    """Ön ayar adına göre yapılandırılmış MfccEngine döndürür."""
+    try:
+        return MfccEngine(**PRESETS[preset])
+    except KeyError:
+        raise ValueError("Bilinmeyen ön işleme ayarı: %s (seçenekler: %s)" % (preset, ', '.join(PRESETS))) from None
+
+def compare_with_librosa(audio, engine=DEFAULT_ENGINE):
+    """Motor çıktısı ile librosa tabanlı eski hesaplama arasındaki en büyük mutlak farkı döndürür."""
+    import librosa
+    mfcc = librosa.feature.mfcc(y=audio, sr=engine.sr, n_mfcc=engine.n_mfcc,
+                                n_fft=engine.n_fft, hop_length=engine.hop_length)
+    if engine.normalize:
+        mfcc = (mfcc - np.mean(mfcc, axis=1, keepdims=True)) / (np.std(mfcc, axis=1, keepdims=True) + 1e-10)
+    if mfcc.shape[1] < engine.max_pad_len:
+        mfcc = np.pad(mfcc, ((0, 0), (0, engine.max_pad_len - mfcc.shape[1])), mode='constant')
+    else:
+        mfcc = mfcc[:, :engine.max_pad_len]
+    return float(np.max(np.abs(engine.features(audio) - mfcc)))
+
+if __name__ == '__main__':
+    import librosa
+    rng = np.random.default_rng(0)
+    clips = [rng.standard_normal(n).astype(np.float32) * 0.1 for n in (800, 6400, 16000, 32000)]
+    clips += [librosa.load(path, sr=SR)[0] for path in sys.argv[1:]]
+    worst = max(compare_with_librosa(clip) for clip in clips)
+    print("librosa ile en büyük mutlak fark: %.2e" % worst)
+    sys.exit(0 if worst < 1e-2 else 1)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Yeni konuşmacılar için hızlı artımlı ince ayar.
+
+Eğitilmiş modelin (.h5 ya da model paketi) konvolüsyonel gövdesi dondurulur; yalnızca son
+sınıflandırma katmanı (başlık) eski ve yeni kayıtların gömmeleri üzerinde yeniden eğitilir.
+Gövdenin sondan bir önceki katman çıktıları (gömmeler) önbelleğe alınır: gövde ince ayarda
+değişmediği için eski korpusun gömmeleri sonraki kayıtlarda da yeniden kullanılır ve ince
+ayar saniyeler sürer. Güncellenen model, eski doğrulama kümesindeki doğruluk gerilemediyse
+model paketi olarak kaydedilir.
+
+Eski doğrulama kümesinin modelin gerçekten doğrulandığı küme olması için veri arttırma ayarları
+model paketinden okunur (train_model her modeli ayarlarıyla birlikte .h5 uzantısız bir pakete de
+kaydeder). Ayarları bilinmeyen düz .h5 modellerde gerileme denetimi yaklaşıktır ve uyarı verilir.
+
+Kullanım:
+  python finetune.py yeni_operator --model sound_command_model_cpu_professional --out operator_paketi
+"""
+
+import os
+import argparse
+import hashlib
+import logging
+import time
+import numpy as np
+import tensorflow as tf
+import train_model
+from inference_backend import is_bundle, read_bundle, load_bundle, save_bundle
+
+MODEL_PATH = train_model.bundle_path(train_model.MODEL_PATH)  # train_model'in ayarlarıyla kaydettiği paket
+OUT_PATH = 'sound_command_model_finetuned'  # Güncellenen modelin kaydedildiği paket dizini
+EMBEDDING_DIR = 'embeddings'  # Özellik önbelleği altında gömmelerin tutulduğu alt dizin
+EPOCHS = 50
+BATCH_SIZE = 256
+LEARNING_RATE = 1e-3
+MAX_REGRESSION = 0.01  # Eski doğrulama kümesinde izin verilen en fazla doğruluk kaybı
+
+def split_model(model):
+    """Modeli gövde (girdi -> son Dense girdisi) ve son Dense katmanına ayırır."""
+    head = model.layers[-1]
+    if not isinstance(head, tf.keras.layers.Dense):
+        raise ValueError("Modelin son katmanı Dense değil: %s" % head.name)
+    backbone = tf.keras.Model(model.inputs, head.input, name='backbone')
+    return backbone, head
+
+def _digest(*arrays):
+    hasher = hashlib.sha1()
+    for array in arrays:
+        hasher.update(np.ascontiguousarray(array).tobytes())
+    return hasher.hexdigest()
+
+def cached_embeddings(backbone, x, cache_path=train_model.CACHE_PATH, batch_size=BATCH_SIZE):
+    """
+    Gövde gömmelerini önbellekten bellek eşlemeli okur; yoksa hesaplayıp kaydeder.
+    Anahtar gövde ağırlıklarının ve özelliklerin içeriğinden türetilir.
+    """
+    if not cache_path:
+        return backbone.predict(x, batch_size=batch_size, verbose=0)
+    key = _digest(_digest(*backbone.get_weights()).encode(), x)
+    cache_file = os.path.join(cache_path, EMBEDDING_DIR, key + '.npy')
+    if os.path.exists(cache_file):
+        return np.load(cache_file, mmap_mode='r')
+    embeddings = np.asarray(backbone.predict(x, batch_size=batch_size, verbose=0), dtype=np.float32)
+    os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+    tmp_file = '%s.%d.tmp.npy' % (cache_file[:-4], os.getpid())
+    np.save(tmp_file, embeddings)
+    os.replace(tmp_file, cache_file)
+    return embeddings
+
+def build_head(head):
+    """Gömmeler üzerinde eğitilecek, özgün başlığın ağırlıklarıyla başlatılmış tek katmanlı model."""
+    inputs = tf.keras.Input(shape=(head.input.shape[-1],))
+    outputs = tf.keras.layers.Dense(head.units, activation=head.activation, name='head')(inputs)
+    model = tf.keras.Model(inputs, outputs)
+    model.layers[-1].set_weights(head.get_weights())
+    return model
+
+def accuracy(model, x, y):
+    if not len(x):
+        return float('nan')
+    return float(np.mean(np.argmax(model.predict(x, batch_size=1024, verbose=0), axis=1) == np.argmax(y, axis=1)))
+
+def finetune_head(head_model, old, new, epochs=EPOCHS, learning_rate=LEARNING_RATE, new_weight=None):
+    """
+    Başlığı eski + yeni gömmeler üzerinde eğitir. Yeni örnekler varsayılan olarak eski veriyle
+    eşit toplam ağırlık alacak şekilde ağırlıklandırılır. En düşük doğrulama kaybındaki ağırlıklar kalır.
+    """
+    (e_old, y_old, v_old, yv_old), (e_new, y_new, v_new, yv_new) = old, new
+    if new_weight is None:
+        new_weight = max(1.0, len(e_old) / max(len(e_new), 1))
+    x = np.concatenate([e_old, e_new])
+    y = np.concatenate([y_old, y_new])
+    weights = np.concatenate([np.ones(len(e_old)), np.full(len(e_new), new_weight)]).astype(np.float32)
+    head_model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate), loss='categorical_crossentropy',
+                       metrics=['accuracy'])
+    callbacks = [tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True)]
+    history = head_model.fit(x, y, sample_weight=weights, batch_size=BATCH_SIZE, epochs=epochs,
+                             validation_data=(np.concatenate([v_old, v_new]), np.concatenate([yv_old, yv_new])),
+                             callbacks=callbacks, verbose=0)
+    logging.info("Başlık %d epoch eğitildi (yeni örnek ağırlığı %.1f)", len(history.history['loss']), new_weight)
+    return head_model
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Yeni kayıtlarla modelin yalnızca başlığını hızlıca yeniden eğitir.")
+    parser.add_argument('new', nargs='*', help="Komut alt klasörlerini içeren yeni kayıt dizinleri")
+    parser.add_argument('--new-corpus', help="Yeni kayıtları dizin yerine paketlenmiş korpustan oku")
+    parser.add_argument('--model', default=MODEL_PATH, help="Temel model (.h5) ya da model paketi dizini")
+    parser.add_argument('--data', default=train_model.DATA_PATH, help="Modelin eğitildiği veri dizini")
+    parser.add_argument('--corpus', help="Eski veriyi dizin yerine paketlenmiş korpustan oku")
+    parser.add_argument('--cache', default=train_model.CACHE_PATH, help="Özellik ve gömme önbelleği dizini")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Özellik çıkarımı için işçi süreç sayısı")
+    parser.add_argument('--out', default=OUT_PATH, help="Güncellenen modelin kaydedileceği paket dizini")
+    parser.add_argument('--epochs', type=int, default=EPOCHS)
+    parser.add_argument('--learning-rate', type=float, default=LEARNING_RATE)
+    parser.add_argument('--new-weight', type=float, help="Yeni örneklerin kayıp ağırlığı (varsayılan: eski/yeni oranı)")
+    parser.add_argument('--max-regression', type=float, default=MAX_REGRESSION,
+                        help="Eski doğrulama kümesinde izin verilen en fazla doğruluk kaybı")
+    parser.add_argument('--force', action='store_true', help="Gerileme olsa da modeli kaydet")
+    args = parser.parse_args()
+    if not args.new and not args.new_corpus:
+        parser.error("En az bir yeni kayıt dizini ya da --new-corpus gerekli")
+    return args
+
+def load_split(args, augmentations, **source):
+    """Veriyi özellik önbelleği üzerinden yükler ve train_model ile aynı bölmeyi döndürür."""
+    return train_model.load_data(cache_path=args.cache, workers=args.workers, augmentations=augmentations,
+                                 augment=bool(augmentations), **source)
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    if not is_bundle(args.model) and is_bundle(train_model.bundle_path(args.model)):
+        # train_model modeli ayarlarıyla birlikte yanındaki pakete de kaydeder
+        logging.info("Model paketi kullanılıyor: %s", train_model.bundle_path(args.model))
+        args.model = train_model.bundle_path(args.model)
+    model, engine, commands = load_bundle(args.model)
+    if not isinstance(model, tf.keras.Model):
+        raise SystemExit("İnce ayar için Keras modeli (.h5) ya da model paketi gerekli: %s" % args.model)
+    commands = commands or train_model.COMMANDS
+
+    # Özellikler modelin eğitildiği ayarlarla üretilir; böylece eski korpus önbellekten okunur
+    config = read_bundle(args.model).get('config', {}) if is_bundle(args.model) else {}
+    if 'augment' not in config:
+        logging.warning("%s eğitim ayarlarını içermiyor: veri arttırmalar varsayılan (%s) kabul ediliyor. "
+                        "Model başka ayarlarla ya da farklı bir dosya sırasıyla eğitildiyse eski doğrulama "
+                        "kümesi eğitim örnekleri içerebilir; gerileme denetimi yalnızca yaklaşıktır.",
+                        args.model, ', '.join(train_model.AUGMENTATIONS) or 'yok')
+    overrides = {key: tuple(config[key]) if isinstance(config[key], list) else config[key]
+                 for key in train_model.AUGMENTATION_SETTINGS.values() if key in config}
+    train_model.configure_features(n_mfcc=engine.n_mfcc, max_pad_len=engine.max_pad_len, **overrides)
+    augmentations = tuple(config.get('augment', train_model.AUGMENTATIONS))
+
+    x_old, xv_old, y_old, yv_old = load_split(args, augmentations, data_path=args.data,
+                                              corpus_path=args.corpus, commands=commands)
+    new_splits = [load_split(args, augmentations, data_path=path, commands=commands) for path in args.new]
+    if args.new_corpus:
+        new_splits.append(load_split(args, augmentations, corpus_path=args.new_corpus, commands=commands))
+    x_new, xv_new, y_new, yv_new = (np.concatenate(parts) for parts in zip(*new_splits))
+    logging.info("Eski veri: %d eğitim / %d doğrulama, yeni veri: %d eğitim / %d doğrulama örneği",
+                 len(x_old), len(xv_old), len(x_new), len(xv_new))
+
+    backbone, head = split_model(model)
+    embed_start = time.perf_counter()
+    old = [cached_embeddings(backbone, x, args.cache) for x in (x_old, xv_old)]
+    new = [cached_embeddings(backbone, x, None) for x in (x_new, xv_new)]
+    logging.info("Gömmeler hazır (%d boyut, %.1f s)", old[0].shape[-1], time.perf_counter() - embed_start)
+
+    head_model = build_head(head)
+    before_old, before_new = accuracy(head_model, old[1], yv_old), accuracy(head_model, new[1], yv_new)
+    finetune_head(head_model, (old[0], y_old, old[1], yv_old), (new[0], y_new, new[1], yv_new),
+                  args.epochs, args.learning_rate, args.new_weight)
+    after_old, after_new = accuracy(head_model, old[1], yv_old), accuracy(head_model, new[1], yv_new)
+    logging.info("Eski doğrulama doğruluğu: %.4f -> %.4f", before_old, after_old)
+    logging.info("Yeni doğrulama doğruluğu: %.4f -> %.4f", before_new, after_new)
+
+    regressed = before_old - after_old > args.max_regression
+    if regressed and not args.force:
+        raise SystemExit("Eski doğrulama kümesinde doğruluk %.4f geriledi (izin verilen %.4f); model kaydedilmedi."
+                         % (before_old - after_old, args.max_regression))
+    head.set_weights(head_model.layers[-1].get_weights())
+    sources = args.new + ([args.new_corpus] if args.new_corpus else [])
+    save_bundle(args.out, model, engine, commands, name=os.path.basename(os.path.normpath(args.out)), config=config,
+                finetune={'base_model': args.model, 'new_sources': sources,
+                          'old_val_accuracy': [before_old, after_old], 'new_val_accuracy': [before_new, after_new],
+                          'regressed': regressed})
+    logging.info("Güncellenen model kaydedildi: %s (toplam %.1f s)", args.out, time.perf_counter() - start)
+
+if __name__ == '__main__':
+    main()
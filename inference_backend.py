@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Hafif çıkarım arka uçları. load_model() dosya uzantısına göre tam Keras modelini, yalnızca
+TFLite yorumlayıcısı ile çalışan TFLiteModel'i ya da http:// adresleri için paylaşılan
+çıkarım sunucusuna bağlanan InferenceClient'ı döndürür. TFLiteModel, betiklerin
+kullandığı predict / predict_on_batch arayüzünü taklit eder; tflite_runtime kuruluysa
+TensorFlow hiç içe aktarılmaz.
+
+Model paketi (bundle), model dosyasını ve bundle.json içinde eğitimde kullanılan MFCC
+parametrelerini ile komut listesini birlikte tutan bir dizindir. load_bundle() modeli ve
+ona uygun MfccEngine'i birlikte döndürür; böylece çıkarım betikleri MAX_PAD_LEN gibi
+ayarları elle kopyalamak zorunda kalmaz.
+"""
+
+import os
+import json
+import threading
+import numpy as np
+from feature_engine import SR, MfccEngine, engine_for
+
+BUNDLE_FILE = 'bundle.json'
+BUNDLE_MODEL = 'model.h5'
+BUNDLE_FORMAT = 1
+
+def _interpreter_class():
+    """Mümkünse tflite_runtime, değilse TensorFlow'un yorumlayıcısını döndürür."""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+class TFLiteModel:
+    """TFLite modelini Keras benzeri bir arayüzle sarar; float16 ve int8 modelleri destekler."""
+
+    def __init__(self, model_path, num_threads=None):
+        self.model_path = model_path
+        self.interpreter = _interpreter_class()(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._lock = threading.Lock()  # Yorumlayıcı iş parçacığı güvenli değildir
+        self._refresh_details()
+
+    def _refresh_details(self):
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+
+    @property
+    def input_shape(self):
+        return tuple(self._input['shape'][1:])
+
+    def _resize(self, batch_size):
+        """Girdi tensörünü gelen yığın boyutuna göre yeniden boyutlandırır."""
+        if self._input['shape'][0] == batch_size:
+            return
+        self.interpreter.resize_tensor_input(self._input['index'], [batch_size, *self.input_shape])
+        self.interpreter.allocate_tensors()
+        self._refresh_details()
+
+    def predict_on_batch(self, x):
+        """(N, n_mfcc, MAX_PAD_LEN, 1) girdisi için (N, sınıf) olasılıklarını döndürür."""
+        x = np.asarray(x, dtype=np.float32)
+        with self._lock:
+            self._resize(len(x))
+            dtype = self._input['dtype']
+            if dtype != np.float32:
+                # Tam tamsayı modelinde girdiyi modelin ölçeğine göre nicemle
+                scale, zero_point = self._input['quantization']
+                info = np.iinfo(dtype)
+                x = np.clip(np.round(x / scale + zero_point), info.min, info.max).astype(dtype)
+            self.interpreter.set_tensor(self._input['index'], x)
+            self.interpreter.invoke()
+            out = self.interpreter.get_tensor(self._output['index'])
+            if self._output['dtype'] != np.float32:
+                scale, zero_point = self._output['quantization']
+                out = (out.astype(np.float32) - zero_point) * scale
+        return out
+
+    def predict(self, x, batch_size=32, verbose=0):
+        """Büyük girdileri batch_size'lık parçalar halinde işler (Keras predict ile uyumlu)."""
+        x = np.asarray(x, dtype=np.float32)
+        outputs = [self.predict_on_batch(x[i:i + batch_size]) for i in range(0, len(x), batch_size)]
+        return np.concatenate(outputs) if outputs else np.zeros((0, self._output['shape'][-1]), np.float32)
+
+def is_bundle(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, BUNDLE_FILE))
+
+def read_bundle(path):
+    """Paketin bundle.json içeriğini döndürür."""
+    with open(os.path.join(path, BUNDLE_FILE), encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('format', 1) > BUNDLE_FORMAT:
+        raise ValueError("Desteklenmeyen model paketi sürümü: %s" % meta.get('format'))
+    return meta
+
+def save_bundle(path, model, engine, commands, **info):
+    """Keras modelini, özellik parametrelerini ve komut listesini path dizinine paket olarak kaydeder."""
+    os.makedirs(path, exist_ok=True)
+    model.save(os.path.join(path, BUNDLE_MODEL))
+    meta = {'format': BUNDLE_FORMAT, 'model': BUNDLE_MODEL, 'commands': list(commands),
+            'features': engine.config()}
+    meta.update(info)
+    _write_meta(path, meta)
+    return path
+
+def update_bundle(path, **info):
+    """Mevcut paketin bundle.json alanlarını günceller; model dosyasına dokunmaz."""
+    meta = read_bundle(path)
+    meta.update(info)
+    _write_meta(path, meta)
+    return meta
+
+def _write_meta(path, meta):
+    tmp_path = os.path.join(path, BUNDLE_FILE + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, os.path.join(path, BUNDLE_FILE))
+
+def load_model(model_path):
+    """
+    'http://' adresleri için sunucu istemcisi, model paketi dizinleri için paketteki model,
+    '.tflite' için TFLiteModel, diğerleri için Keras modeli.
+    """
+    if model_path.startswith('http://'):
+        from inference_server import InferenceClient
+        return InferenceClient(model_path)
+    if is_bundle(model_path):
+        return load_model(os.path.join(model_path, read_bundle(model_path)['model']))
+    if model_path.endswith('.tflite'):
+        return TFLiteModel(model_path)
+    import tensorflow as tf
+    return tf.keras.models.load_model(model_path)
+
+def _feature_shape(model):
+    """Modelin beklediği (n_mfcc, çerçeve) boyutları; bilinmiyorsa None."""
+    shape = getattr(model, 'input_shape', None)
+    if shape is None:
+        return None
+    shape = tuple(shape)
+    return shape[-3:-1] if len(shape) >= 3 else None
+
+def load_bundle(model_path, preset='professional'):
+    """
+    (model, MfccEngine, komutlar) döndürür. Paketlerde motor paketteki parametrelerle, çıkarım
+    sunucularında sunucunun /health yanıtındaki parametrelerle kurulur; düz model dosyalarında
+    ön ayar (feature_engine.PRESETS) kullanılır ve komutlar None'dır.
+    Modelin girdi boyutu motorun çıktısıyla uyuşmazsa ValueError yükselir.
+    """
+    if model_path.startswith('http://'):
+        # Sunucudaki modelin özellik ayarları /health ile alınır; yerel ön ayar kullanılmaz
+        model = load_model(model_path)
+        health = model.health()
+        engine = MfccEngine(**health['features']) if 'features' in health else engine_for(preset)
+        commands = health.get('commands')
+    elif is_bundle(model_path):
+        meta = read_bundle(model_path)
+        engine = MfccEngine(**meta['features'])
+        commands = meta.get('commands')
+    else:
+        engine = engine_for(preset)
+        commands = None
+    if engine.sr != SR:
+        raise ValueError("Model %d Hz özelliklerle eğitilmiş, kayıt %d Hz" % (engine.sr, SR))
+    if not model_path.startswith('http://'):
+        model = load_model(model_path)
+    expected = _feature_shape(model)
+    if expected is not None and tuple(expected) != (engine.n_mfcc, engine.max_pad_len):
+        raise ValueError("Model (%s) girdisi %s, özellik motoru (%d, %d) üretiyor; MFCC ayarları uyuşmuyor"
+                         % (model_path, tuple(expected), engine.n_mfcc, engine.max_pad_len))
+    return model, engine, commands
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Yerel çok istemcili çıkarım sunucusu. Model bir kez yüklenir; localhost HTTP üzerinden gelen
+MFCC tensörleri ya da ham 16 kHz PCM istekleri, en fazla --max-wait-ms bekleyen dinamik
+mikro yığınlar halinde birlikte sınıflandırılır. Yanıt etiket, güven ve olasılıkları içerir.
+GET /metrics aşama sürelerini Prometheus metin biçiminde döndürür.
+
+Sunucu:  python inference_server.py --model sound_command_model_cpu_professional.h5
+İstemci: betiklerde model yolu yerine 'http://127.0.0.1:8765' verilmesi yeterlidir
+         (inference_backend.load_model InferenceClient döndürür).
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+import numpy as np
+from feature_engine import SR, COMMANDS, DEFAULT_ENGINE
+import metrics
+
+MODEL_PATH = 'sound_command_model_cpu_professional.h5'
+HOST = '127.0.0.1'
+PORT = 8765
+MAX_BATCH = 32  # Bir mikro yığındaki en fazla örnek
+MAX_WAIT_MS = 5.0  # İlk istekten sonra yığını doldurmak için beklenecek en uzun süre
+
+class _Request:
+    __slots__ = ('features', 'done', 'result', 'error')
+
+    def __init__(self, features):
+        self.features = features
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class MicroBatcher:
+    """Eşzamanlı istekleri toplayıp modeli tek bir predict_on_batch çağrısıyla çalıştırır."""
+
+    def __init__(self, model, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, input_shape=None):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.input_shape = tuple(input_shape) if input_shape is not None else None
+        self.batches = 0
+        self.samples = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def _validate(self, features):
+        """Hatalı bir isteğin yığındaki diğer istekleri düşürmemesi için girdiyi sıraya almadan denetler."""
+        if features.ndim != 4 or not len(features):
+            raise ValueError("Girdi boş olmayan (n, n_mfcc, çerçeve, 1) dizisi olmalı, gelen %s" % (features.shape,))
+        if self.input_shape is not None and features.shape[1:] != self.input_shape:
+            raise ValueError("Girdi boyutu %s, model %s bekliyor" % (features.shape[1:], self.input_shape))
+
+    def submit(self, features):
+        """
+        (n, n_mfcc, MAX_PAD_LEN, 1) özellikleri sıraya alır ve olasılıkları bekleyip döndürür.
+        max_batch'ten büyük istekler parçalara bölünür. Geçersiz girdide ValueError yükselir.
+        """
+        features = np.asarray(features, dtype=np.float32)
+        self._validate(features)
+        requests = [_Request(features[i:i + self.max_batch]) for i in range(0, len(features), self.max_batch)]
+        for request in requests:
+            self._queue.put(request)
+        for request in requests:
+            request.done.wait()
+            if request.error is not None:
+                raise request.error
+        return np.concatenate([request.result for request in requests])
+
+    def _predict(self, batch):
+        with metrics.timer('inference'):
+            return np.asarray(self.model.predict_on_batch(np.concatenate([r.features for r in batch])))
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            count = len(batch[0].features)
+            deadline = time.monotonic() + self.max_wait
+            while count < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(request)
+                count += len(request.features)
+            try:
+                probs = self._predict(batch)
+            except Exception as e:
+                if len(batch) == 1:
+                    metrics.inc('inference_errors')
+                    batch[0].error = e
+                    batch[0].done.set()
+                    continue
+                # Hatalı isteğin diğerlerini düşürmemesi için istekleri tek tek çalıştır
+                logging.warning("%d isteklik yığın başarısız (%s); istekler tek tek çalıştırılıyor", len(batch), e)
+                probs = None
+            offset = 0
+            for request in batch:
+                if probs is not None:
+                    request.result = probs[offset:offset + len(request.features)]
+                    offset += len(request.features)
+                else:
+                    try:
+                        request.result = self._predict([request])
+                    except Exception as e:
+                        metrics.inc('inference_errors')
+                        request.error = e
+                        count -= len(request.features)
+                request.done.set()
+            self.batches += 1
+            self.samples += count
+            metrics.inc('batches')
+            metrics.inc('samples', count)
+
+def _response(probs):
+    indices = np.argmax(probs, axis=1)
+    return {
+        'labels': [COMMANDS[i] for i in indices],
+        'confidences': [float(p[i]) for p, i in zip(probs, indices)],
+        'probabilities': probs.tolist(),
+    }
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    """POST /predict: gövde float32 (ya da int16 PCM) ham baytlardır; başlıklar girdiyi tanımlar."""
+
+    protocol_version = 'HTTP/1.1'  # Bağlantılar istemci tarafında yeniden kullanılabilsin
+    batcher = None
+    model_path = None
+    engine = DEFAULT_ENGINE  # Model paketindeki MFCC ayarlarıyla değiştirilir
+
+    def log_message(self, format, *args):
+        logging.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/metrics':
+            body = metrics.REGISTRY.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if self.path != '/health':
+            self._send_json(404, {'error': 'bulunamadı'})
+            return
+        # İstemciler özellikleri sunucudaki modelle aynı ayarlarla çıkarabilsin diye motor ayarları da döner
+        self._send_json(200, {'status': 'ok', 'model': self.model_path, 'batches': self.batcher.batches,
+                              'samples': self.batcher.samples, 'commands': COMMANDS,
+                              'features': self.engine.config(),
+                              'input_shape': [self.engine.n_mfcc, self.engine.max_pad_len, 1]})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._send_json(404, {'error': 'bulunamadı'})
+            return
+        start = time.perf_counter()
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        try:
+            kind = self.headers.get('X-Input-Kind', 'mfcc')
+            if kind == 'mfcc':
+                features = np.frombuffer(body, dtype=np.float32).reshape(-1, self.engine.n_mfcc, self.engine.max_pad_len, 1)
+            elif kind == 'pcm':
+                if int(self.headers.get('X-Sample-Rate', SR)) != SR:
+                    raise ValueError("PCM %d Hz olmalı" % SR)
+                dtype = self.headers.get('X-Dtype', 'float32')
+                if dtype == 'int16':
+                    audio = np.frombuffer(body, dtype='<i2').astype(np.float32) / 32767
+                else:
+                    audio = np.frombuffer(body, dtype=np.float32)
+                with metrics.timer('features'):
+                    features = self.engine.batch([audio])
+            else:
+                raise ValueError("Bilinmeyen girdi türü: %s" % kind)
+        except ValueError as e:
+            metrics.inc('bad_requests')
+            self._send_json(400, {'error': str(e)})
+            return
+        try:
+            probs = self.batcher.submit(features)
+        except ValueError as e:
+            metrics.inc('bad_requests')
+            self._send_json(400, {'error': str(e)})
+            return
+        except Exception as e:
+            logging.exception("Çıkarım hatası")
+            self._send_json(500, {'error': str(e)})
+            return
+        self._send_json(200, _response(probs))
+        metrics.observe('request', time.perf_counter() - start)
+
+class InferenceClient:
+    """Çıkarım sunucusuna bağlanan, Keras modeli gibi kullanılabilen istemci."""
+
+    def __init__(self, url, timeout=10.0):
+        parts = urlsplit(url)
+        self.url = url
+        self.host = parts.hostname or HOST
+        self.port = parts.port or PORT
+        self.timeout = timeout
+        self._conn = None
+        self._health = None
+        self._lock = threading.Lock()
+
+    def _request(self, method, path, body=None, headers=None):
+        with self._lock:
+            for attempt in range(2):
+                if self._conn is None:
+                    self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+                try:
+                    self._conn.request(method, path, body=body, headers=headers or {})
+                    response = self._conn.getresponse()
+                    payload = json.loads(response.read())
+                    break
+                except (http.client.HTTPException, OSError):
+                    # Sunucu kalıcı bağlantıyı kapatmış olabilir; bir kez yeniden bağlan
+                    self._conn.close()
+                    self._conn = None
+                    if attempt:
+                        raise
+        if response.status != 200:
+            raise RuntimeError("Çıkarım sunucusu hatası (%d): %s" % (response.status, payload.get('error')))
+        return payload
+
+    def _post(self, body, headers):
+        return self._request('POST', '/predict', body, headers)
+
+    def health(self):
+        """Sunucunun /health yanıtını (model, komutlar, MFCC ayarları, girdi boyutu) döndürür; ilk yanıt saklanır."""
+        if self._health is None:
+            self._health = self._request('GET', '/health')
+        return self._health
+
+    @property
+    def input_shape(self):
+        """Keras modelleri gibi (None, n_mfcc, çerçeve, 1); eski sunucularda bilinmiyorsa None."""
+        shape = self.health().get('input_shape')
+        return (None, *shape) if shape else None
+
+    def classify(self, x):
+        """MFCC yığını için etiket, güven ve olasılıkları içeren yanıtı döndürür."""
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        return self._post(x.tobytes(), {'Content-Type': 'application/octet-stream', 'X-Input-Kind': 'mfcc'})
+
+    def classify_pcm(self, audio):
+        """Ham 16 kHz ses için sunucu tarafında özellik çıkarıp sınıflandırır."""
+        audio = np.ascontiguousarray(audio, dtype=np.float32).reshape(-1)
+        return self._post(audio.tobytes(), {'Content-Type': 'application/octet-stream', 'X-Input-Kind': 'pcm',
+                                            'X-Sample-Rate': str(SR), 'X-Dtype': 'float32'})
+
+    def predict_on_batch(self, x):
+        return np.asarray(self.classify(x)['probabilities'], dtype=np.float32)
+
+    def predict(self, x, batch_size=MAX_BATCH, verbose=0):
+        x = np.asarray(x, dtype=np.float32)
+        outputs = [self.predict_on_batch(x[i:i + batch_size]) for i in range(0, len(x), batch_size)]
+        return np.concatenate(outputs) if outputs else np.zeros((0, len(COMMANDS)), np.float32)
+
+def serve(model_path=MODEL_PATH, host=HOST, port=PORT, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS):
+    """Modeli yükler, ısındırır ve istekleri sonsuza dek sunar."""
+    global COMMANDS
+    from inference_backend import load_bundle
+    logging.info("Model yükleniyor: %s", model_path)
+    model, engine, commands = load_bundle(model_path)
+    COMMANDS = commands or COMMANDS
+    model.predict_on_batch(np.zeros((1, engine.n_mfcc, engine.max_pad_len, 1), dtype=np.float32))
+    InferenceHandler.batcher = MicroBatcher(model, max_batch, max_wait_ms,
+                                            input_shape=(engine.n_mfcc, engine.max_pad_len, 1))
+    InferenceHandler.model_path = model_path
+    InferenceHandler.engine = engine
+    server = ThreadingHTTPServer((host, port), InferenceHandler)
+    server.daemon_threads = True
+    logging.info("Çıkarım sunucusu http://%s:%d adresinde (yığın %d, bekleme %.1f ms)",
+                 host, port, max_batch, max_wait_ms)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logging.info("Çıkarım sunucusu kapatılıyor.")
+    finally:
+        server.server_close()
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Mikro yığınlamalı yerel çıkarım sunucusu.")
+    parser.add_argument('--model', default=MODEL_PATH, help="Model dosyası (.h5 ya da .tflite) ya da model paketi dizini")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--max-batch', type=int, default=MAX_BATCH, help="Mikro yığın başına en fazla örnek")
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_MS,
+                        help="Yığını doldurmak için en uzun bekleme (ms)")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.configure_from_args(args)
+    serve(args.model, args.host, args.port, args.max_batch, args.max_wait_ms)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Sıcak yol ölçümleri: sayaçlar, gecikme histogramları ve aşama zamanlayıcıları.
+Kayıt, MFCC, çıkarım ve seri yazma gibi aşamalar `timer('features')` ile sarılır; ölçümler
+süreç içinde her zaman toplanır (kilit altında birkaç toplama, ihmal edilebilir maliyet).
+
+Dışa aktarım:
+  - summary_lines(): arayüz günlük paneli ve log için okunabilir özet
+  - Prometheus metin biçiminde, belirli aralıklarla atomik olarak yeniden yazılan dosya
+  - İsteğe bağlı cProfile dökümü (süreç kapanırken yazılır)
+
+Betikler configure() ile ya da ortam değişkenleriyle ayarlanır:
+  SES_METRICS_FILE=metrics.prom SES_METRICS_PROFILE=profil.pstats python python_kod.py
+"""
+
+import os
+import atexit
+import bisect
+import collections
+import cProfile
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_FILE_ENV = 'SES_METRICS_FILE'
+METRICS_INTERVAL_ENV = 'SES_METRICS_INTERVAL'
+PROFILE_ENV = 'SES_METRICS_PROFILE'
+FLUSH_INTERVAL = 10.0  # Metrik dosyasının yeniden yazılma aralığı (saniye)
+PREFIX = 'ses_komut'  # Prometheus metrik adı öneki
+# Aşama süreleri için histogram kovaları (saniye)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+RECENT_SAMPLES = 512  # Yüzdelik özetleri için aşama başına saklanan son ölçüm sayısı
+
+class Histogram:
+    """Kümülatif kovalı gecikme histogramı; son ölçümlerden yüzdelik de hesaplar."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Son kova +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.recent = collections.deque(maxlen=RECENT_SAMPLES)
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.recent.append(value)
+
+    def percentile(self, q):
+        if not self.recent:
+            return 0.0
+        values = sorted(self.recent)
+        return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+def _bucket_labels(buckets):
+    return [repr(b) for b in buckets] + ['+Inf']
+
+class Registry:
+    """Süreç genelindeki sayaç ve histogramları iş parçacığı güvenli şekilde tutar."""
+
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            if stage not in self.histograms:
+                self.histograms[stage] = Histogram()
+            self.histograms[stage].observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        """Bloğun süresini aşamanın histogramına ekler."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def reset(self):
+        """Tüm sayaç ve histogramları siler (ör. benchmark.py'de boru hatları arasında)."""
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def last(self, stage):
+        """Aşamanın son ölçümü (saniye); ölçüm yoksa None."""
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            return histogram.recent[-1] if histogram and histogram.recent else None
+
+    def summary_lines(self):
+        """Her aşama için 'aşama: n, p50, p95, en büyük' ve sayaç satırları."""
+        with self._lock:
+            lines = []
+            for stage, h in sorted(self.histograms.items()):
+                lines.append("%s: n=%d p50=%.1f ms p95=%.1f ms max=%.1f ms" % (
+                    stage, h.count, h.percentile(50) * 1000, h.percentile(95) * 1000,
+                    max(h.recent, default=0.0) * 1000))
+            for name, value in sorted(self.counters.items()):
+                lines.append("%s: %d" % (name, value))
+        return lines
+
+    def prometheus_text(self):
+        """Prometheus metin biçiminde (0.0.4) tüm ölçümler."""
+        with self._lock:
+            out = []
+            for name, value in sorted(self.counters.items()):
+                metric = '%s_%s_total' % (PREFIX, name)
+                out.append('# TYPE %s counter' % metric)
+                out.append('%s %d' % (metric, value))
+            if self.histograms:
+                metric = '%s_stage_seconds' % PREFIX
+                out.append('# HELP %s Aşama başına gecikme.' % metric)
+                out.append('# TYPE %s histogram' % metric)
+                for stage, h in sorted(self.histograms.items()):
+                    cumulative = 0
+                    for bound, count in zip(_bucket_labels(h.buckets), h.counts):
+                        cumulative += count
+                        out.append('%s_bucket{stage="%s",le="%s"} %d' % (metric, stage, bound, cumulative))
+                    out.append('%s_sum{stage="%s"} %.9f' % (metric, stage, h.sum))
+                    out.append('%s_count{stage="%s"} %d' % (metric, stage, h.count))
+        return '\n'.join(out) + '\n'
+
+    def write_prometheus(self, path):
+        """Metrik dosyasını atomik olarak yeniden yazar (okuyucu yarım dosya görmez)."""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+REGISTRY = Registry()
+inc = REGISTRY.inc
+observe = REGISTRY.observe
+timer = REGISTRY.timer
+last = REGISTRY.last
+summary_lines = REGISTRY.summary_lines
+
+def record_stream_status(status, frames):
+    """
+    sounddevice callback'inin status bayraklarını sayar. input_overflow, ses sürücüsünün
+    blok(lar) düşürdüğünü gösterir; o callback'in çerçeve sayısı düşen çerçeve olarak eklenir.
+    """
+    inc('audio_callbacks')
+    if not status:
+        return
+    if getattr(status, 'input_overflow', False):
+        inc('audio_input_overflows')
+        inc('audio_dropped_frames', frames)
+    if getattr(status, 'input_underflow', False):
+        inc('audio_input_underflows')
+
+class _Flusher(threading.Thread):
+    def __init__(self, path, interval):
+        super().__init__(name='metrics-flusher', daemon=True)
+        self.path = path
+        self.interval = interval
+        self.stop = threading.Event()
+
+    def run(self):
+        while not self.stop.wait(self.interval):
+            self.flush()
+
+    def flush(self):
+        try:
+            REGISTRY.write_prometheus(self.path)
+        except OSError as e:
+            logging.warning("Metrik dosyası yazılamadı (%s): %s", self.path, e)
+
+_flusher = None
+_profile_path = None
+_profilers = {}  # İş parçacığı adı -> cProfile.Profile (cProfile yalnızca kendi iş parçacığını görür)
+
+def configure(metrics_file=None, interval=None, profile=None):
+    """
+    Metrik dosyası yazımını ve profillemeyi başlatır. Verilmeyen ayarlar ortam
+    değişkenlerinden okunur; hiçbiri yoksa yalnızca süreç içi toplama yapılır.
+    Profilleme çağıran iş parçacığında başlar; işçi iş parçacıkları profiled() kullanır.
+    """
+    global _flusher, _profile_path
+    metrics_file = metrics_file or os.environ.get(METRICS_FILE_ENV)
+    interval = interval or float(os.environ.get(METRICS_INTERVAL_ENV, FLUSH_INTERVAL))
+    profile = profile or os.environ.get(PROFILE_ENV)
+    if metrics_file and _flusher is None:
+        _flusher = _Flusher(metrics_file, interval)
+        _flusher.start()
+        atexit.register(_flusher.flush)
+        logging.info("Metrikler %s dosyasına %.0f saniyede bir yazılıyor.", metrics_file, interval)
+    if profile and _profile_path is None:
+        _profile_path = profile
+        atexit.register(_dump_profiles)
+        _thread_profiler().enable()
+        logging.info("Profilleme açık; döküm çıkışta %s dosyasına yazılacak.", profile)
+
+def _thread_profiler():
+    name = threading.current_thread().name
+    if name not in _profilers:
+        _profilers[name] = cProfile.Profile()
+    return _profilers[name]
+
+@contextmanager
+def profiled():
+    """Profilleme açıksa bloğu geçerli iş parçacığının profiline ekler; kapalıysa etkisizdir."""
+    if _profile_path is None or threading.current_thread() is threading.main_thread():
+        # Ana iş parçacığının profili configure() ile zaten açıktır
+        yield
+        return
+    profiler = _thread_profiler()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+
+def _dump_profiles():
+    for name, profiler in list(_profilers.items()):
+        profiler.disable()
+        path = _profile_path if name == 'MainThread' else '%s.%s' % (_profile_path, name)
+        profiler.dump_stats(path)
+        logging.info("Profil kaydedildi: %s (python -m pstats %s)", path, path)
+
+def add_arguments(parser):
+    """argparse kullanan betiklere ortak --metrics-file / --profile seçeneklerini ekler."""
+    parser.add_argument('--metrics-file', help="Prometheus metin biçimli metrik dosyası (periyodik yazılır)")
+    parser.add_argument('--metrics-interval', type=float, help="Metrik dosyası yazma aralığı (saniye)")
+    parser.add_argument('--profile', help="Çıkışta yazılacak cProfile dökümü (.pstats)")
+
+def configure_from_args(args):
+    configure(args.metrics_file, args.metrics_interval, args.profile)
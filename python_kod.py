@@ -1,18 +1,27 @@
+import sys
 import tkinter as tk
 from tkinter import ttk
 from tkinter.scrolledtext import ScrolledText
 import serial
 import serial.tools.list_ports
+from serial_transport import SerialTransport
 import numpy as np
-import librosa
 import sounddevice as sd
-import tensorflow as tf
-from threading import Thread
+import queue
+from threading import Thread, current_thread, main_thread
 from datetime import datetime
+from feature_engine import SR, COMMANDS, DEFAULT_ENGINE
+from streaming import RingBuffer, Endpointer
+from inference_backend import load_bundle
+import metrics
 
-# === Model yükleniyor ===
-model = tf.keras.models.load_model("sound_command_model_cpu_professional.h5")
-labels = ['dur', 'duz_devam_et', 'geri_don', 'sag_don', 'sola_don']
+# === Model arka planda yüklenir; pencere beklemeden açılır ===
+# İlk argüman ile .tflite dosyası, model paketi dizini ya da çıkarım sunucusu adresi (http://127.0.0.1:8765) verilebilir
+MODEL_PATH = "sound_command_model_cpu_professional.h5"
+model = None
+ozellik_motoru = DEFAULT_ENGINE  # Model paketindeki MFCC ayarlarıyla değiştirilir
+model_hatasi = None
+labels = list(COMMANDS)
 komut_kodlari = {
     'dur': 'S',
     'duz_devam_et': 'F',
@@ -21,114 +30,259 @@ komut_kodlari = {
     'sola_don': 'L'
 }
 
-ser = None  # Global seri port nesnesi
+ISTATISTIK_ARALIGI = 10  # Bu kadar komutta bir aşama özeti günlük paneline yazılır
+
+tasiyici = None  # Seri taşıyıcı (tek bağlantı, engellemeyen giden kuyruk)
+# Arayüz bileşenleri main() içinde kurulur; modül pencere açmadan içe aktarılabilir (benchmark.py)
+pencere = etiket = buton = port_combo = log_text = son_karakter_etiketi = None
+
+# Konuşma uç noktası tespiti ile kayıt: konuşma bitince kayıt hemen durur
+KAYIT_AZAMI_SANIYE = 2  # Bir komutun azami uzunluğu
+KONUSMA_BEKLEME_SANIYE = 5  # Bu süre içinde konuşma başlamazsa kayıt iptal edilir
+KAYIT_BLOK = 320  # Mikrofon blok boyutu (20 ms)
+
+# Tek tanıma işçisi için sınırlı iş kuyruğu: bekleyen en fazla bir basış tutulur,
+# işçi meşgulken gelen ek basışlar bu bekleyen işle birleştirilir
+is_kuyrugu = queue.Queue(maxsize=1)
+# İşçiden ana döngüye aktarılan arayüz güncellemeleri (Tk iş parçacığı güvenli değildir)
+arayuz_kuyrugu = queue.Queue()
+
+def arayuzde(fonksiyon, *args, **kwargs):
+    # Ana döngüdeysek hemen çalıştır, değilsek ana döngüye aktar
+    if current_thread() is main_thread():
+        fonksiyon(*args, **kwargs)
+    else:
+        arayuz_kuyrugu.put((fonksiyon, args, kwargs))
+
+def arayuz_kuyrugunu_isle():
+    while True:
+        try:
+            fonksiyon, args, kwargs = arayuz_kuyrugu.get_nowait()
+        except queue.Empty:
+            break
+        fonksiyon(*args, **kwargs)
+    pencere.after(50, arayuz_kuyrugunu_isle)
 
 def log_yaz(mesaj):
+    if current_thread() is not main_thread():
+        arayuzde(log_yaz, mesaj)
+        return
     zaman = datetime.now().strftime("%H:%M:%S")
     log_text.configure(state="normal")
     log_text.insert(tk.END, f"[{zaman}] {mesaj}\n")
     log_text.configure(state="disabled")
     log_text.see(tk.END)
 
+def modeli_yukle():
+    global model, model_hatasi, ozellik_motoru, labels
+    try:
+        yuklenen, motor, komutlar = load_bundle(MODEL_PATH)
+        # Isınma çıkarımı: graf izleme maliyeti ilk gerçek komutta ödenmesin
+        yuklenen.predict_on_batch(np.zeros((1, motor.n_mfcc, motor.max_pad_len, 1), dtype=np.float32))
+        ozellik_motoru = motor
+        labels = komutlar or labels
+        model = yuklenen
+    except Exception as e:
+        model_hatasi = e
+
+def model_durumunu_kontrol_et():
+    # Tk bileşenleri yalnızca ana döngüden güncellenir; arka plan iş parçacığı burada yoklanır
+    if model is not None:
+        log_yaz("✅ Model yüklendi.")
+        etiket.config(text="Butona basıp komut söyleyin.")
+        buton.config(state="normal")
+    elif model_hatasi is not None:
+        log_yaz(f"❌ Model yüklenemedi: {model_hatasi}")
+        etiket.config(text="❌ Model yüklenemedi.")
+    else:
+        pencere.after(100, model_durumunu_kontrol_et)
+
+def gonderim_bildirimi(kayit):
+    # Taşıyıcının iş parçacığından çağrılır; arayüz güncellemeleri ana döngüye aktarılır
+    if kayit is None:
+        log_yaz("❌ Seri yazma hatası, yeniden bağlanılıyor...")
+        arayuzde(son_karakter_etiketi.config, text="🔴 Gönderilemedi")
+        return
+    log_yaz(f"📤 Gönderildi: {kayit.command} (bekleme {kayit.queue_wait * 1000:.1f} ms, "
+            f"yazma {kayit.write_duration * 1000:.1f} ms)")
+    arayuzde(son_karakter_etiketi.config, text=f"🟢 Gönderilen: {kayit.command}")
+
+def portu_ac(port):
+    try:
+        tasiyici.open(port)
+        log_yaz(f"✅ {port} portu açıldı.")
+    except serial.SerialException as e:
+        log_yaz(f"❌ Seri port açılamadı: {e}")
+
+def port_secildi(event=None):
+    if port_combo.get():
+        portu_ac(port_combo.get())
+
 def seri_portlari_yenile():
-    global ser
     ports = serial.tools.list_ports.comports()
     portlar = [port.device for port in ports]
     port_combo['values'] = portlar
     if portlar:
-        port_combo.current(0)
-        try:
-            ser = serial.Serial(portlar[0], 9600, timeout=1)
-            log_yaz(f"✅ {portlar[0]} portu açıldı.")
-        except serial.SerialException as e:
-            log_yaz(f"❌ Seri port açılamadı: {e}")
+        # Seçili port korunur; açık bağlantı zaten o porttaysa yeniden açılmaz
+        secili = tasiyici.port if tasiyici.port in portlar else portlar[0]
+        port_combo.current(portlar.index(secili))
+        if not (tasiyici.port == secili and tasiyici.is_open):
+            portu_ac(secili)
     else:
         log_yaz("❗ Seri port bulunamadı.")
 
 def sesi_kaydet():
-    fs = 16000
-    saniye = 2
-    log_yaz("🎙 Kayıt başladı...")
-    ses = sd.rec(int(saniye * fs), samplerate=fs, channels=1)
-    sd.wait()
-    log_yaz("🎙 Kayıt bitti.")
-    return ses.flatten(), fs
+    # Mikrofonu bloklar halinde dinler; konuşma bitişi (hangover sonrası) ya da azami süre
+    # dolunca durur ve yalnızca konuşma aralığını döndürür. Her kayıt yeni bir Endpointer ile
+    # başlar; butona basılırken söylenmeye başlanan komut da (ör. "dur") ilk bloktan yakalanır.
+    fs = SR
+    bloklar = queue.Queue()
 
-def mfcc_ozellikleri(sinyal, sr):
-    mfcc = librosa.feature.mfcc(y=sinyal, sr=sr, n_mfcc=40)
-    mfcc = (mfcc - np.mean(mfcc, axis=1, keepdims=True)) / (np.std(mfcc, axis=1, keepdims=True) + 1e-10)
+    def geri_cagirma(indata, frames, time_info, status):
+        metrics.record_stream_status(status, frames)
+        bloklar.put(indata[:, 0].copy())
 
-    if mfcc.shape[1] < 44:
-        pad = 44 - mfcc.shape[1]
-        mfcc = np.pad(mfcc, ((0, 0), (0, pad)), mode='constant')
-    else:
-        mfcc = mfcc[:, :44]
+    halka = RingBuffer(int((KONUSMA_BEKLEME_SANIYE + KAYIT_AZAMI_SANIYE + 1) * fs))
+    uc_nokta = Endpointer(fs, frame_length=KAYIT_BLOK, max_length=KAYIT_AZAMI_SANIYE)
+    aralik = None
+    log_yaz("🎙 Kayıt başladı...")
+    with sd.InputStream(samplerate=fs, channels=1, blocksize=KAYIT_BLOK, callback=geri_cagirma):
+        while aralik is None:
+            blok = bloklar.get(timeout=1)
+            halka.write(blok)
+            bitenler = uc_nokta.push(blok)
+            if bitenler:
+                aralik = bitenler[0]
+            elif not uc_nokta.in_speech and halka.total_written >= KONUSMA_BEKLEME_SANIYE * fs:
+                break
+    if aralik is None:
+        log_yaz("🎙 Kayıt bitti, konuşma algılanmadı.")
+        return None, fs
+    log_yaz(f"🎙 Kayıt bitti ({(aralik[1] - aralik[0]) / fs:.2f} s konuşma).")
+    return halka.read(*aralik), fs
+
+def istatistikleri_yaz():
+    satirlar = metrics.summary_lines()
+    if not satirlar:
+        log_yaz("📊 Henüz ölçüm yok.")
+        return
+    log_yaz("📊 Aşama süreleri:")
+    for satir in satirlar:
+        log_yaz("   " + satir)
 
-    mfcc = mfcc.reshape(1, 40, 44, 1)
-    return mfcc
+def mfcc_ozellikleri(sinyal, sr):
+    # Modelin özellik motoru (1, n_mfcc, max_pad_len, 1) şeklinde MFCC döndürür
+    if sr != SR:
+        raise ValueError(f"Özellik motoru {SR} Hz bekliyor, {sr} Hz verildi")
+    return ozellik_motoru.batch([sinyal])
 
 def ses_tanima_ve_gonder():
-    global ser
-    etiket.config(text="🎤 Dinleniyor...")
-    ses, sr = sesi_kaydet()
-    ozellik = mfcc_ozellikleri(ses, sr)
-    tahmin = model.predict(ozellik)
+    arayuzde(etiket.config, text="🎤 Dinleniyor...")
+    with metrics.timer('capture'):
+        ses, sr = sesi_kaydet()
+    if ses is None:
+        metrics.inc('no_speech')
+        arayuzde(etiket.config, text="❗ Konuşma algılanmadı.")
+        return
+    with metrics.timer('features'):
+        ozellik = mfcc_ozellikleri(ses, sr)
+    with metrics.timer('inference'):
+        tahmin = model.predict_on_batch(ozellik)
     index = np.argmax(tahmin)
     komut = labels[index]
+    metrics.inc('commands')
 
-    log_yaz(f"✅ Tanınan komut: {komut}")
-    etiket.config(text=f"✅ Komut: {komut}")
+    log_yaz(f"✅ Tanınan komut: {komut} (kayıt {metrics.last('capture') * 1000:.0f} ms, "
+            f"mfcc {metrics.last('features') * 1000:.1f} ms, çıkarım {metrics.last('inference') * 1000:.1f} ms)")
+    if metrics.REGISTRY.counters['commands'] % ISTATISTIK_ARALIGI == 0:
+        istatistikleri_yaz()
+    arayuzde(etiket.config, text=f"✅ Komut: {komut}")
     veri = komut_kodlari.get(komut, '')
 
     if veri:
-        if ser and ser.is_open:
-            ser.write(veri.encode())
-            log_yaz(f"📤 Gönderildi: {veri}")
-            son_karakter_etiketi.config(text=f"🟢 Gönderilen: {veri}")
-            etiket.config(text=f"📤 Seri porta gönderildi: {veri}")
+        if tasiyici.port:
+            # Engellemeyen gönderim; sonuç gonderim_bildirimi ile raporlanır
+            tasiyici.send(veri)
+            arayuzde(etiket.config, text=f"📤 Seri porta gönderiliyor: {veri}")
         else:
             log_yaz("❗ Seri port açık değil.")
-            etiket.config(text="❗ Port kapalı.")
-            son_karakter_etiketi.config(text="🔴 Gönderilemedi")
+            arayuzde(etiket.config, text="❗ Port kapalı.")
+            arayuzde(son_karakter_etiketi.config, text="🔴 Gönderilemedi")
     else:
-        etiket.config(text="❗ Komut eşleşmedi.")
+        arayuzde(etiket.config, text="❗ Komut eşleşmedi.")
         log_yaz(f"❗ '{komut}' komutu eşleşmedi.")
-        son_karakter_etiketi.config(text="⚪ Tanınmayan komut")
+        arayuzde(son_karakter_etiketi.config, text="⚪ Tanınmayan komut")
+
+def tanima_iscisi():
+    # Tek, uzun ömürlü işçi: kayıt, model ve seri port aynı anda tek bir iş tarafından kullanılır
+    while True:
+        is_kuyrugu.get()
+        try:
+            with metrics.profiled():
+                ses_tanima_ve_gonder()
+        except Exception as e:
+            metrics.inc('errors')
+            log_yaz(f"❌ Tanıma hatası: {e}")
+            arayuzde(etiket.config, text="❌ Tanıma hatası.")
+        finally:
+            is_kuyrugu.task_done()
 
 def butona_basildi():
-    Thread(target=ses_tanima_ve_gonder).start()
+    try:
+        is_kuyrugu.put_nowait("tanima")
+    except queue.Full:
+        log_yaz("⏳ Önceki komut bekliyor, basış birleştirildi.")
+
+def main():
+    global MODEL_PATH, pencere, etiket, buton, port_combo, log_text, son_karakter_etiketi, tasiyici
+    if len(sys.argv) > 1:
+        MODEL_PATH = sys.argv[1]
+    # Aşama süreleri her zaman toplanır; SES_METRICS_FILE / SES_METRICS_PROFILE ile dosyaya da yazılır
+    metrics.configure()
+
+    # GUI
+    pencere = tk.Tk()
+    pencere.title("Akıllı Köpek Sesli Kontrol")
+    pencere.geometry("500x600")
+
+    etiket = tk.Label(pencere, text="⏳ Model yükleniyor...", font=("Arial", 14))
+    etiket.pack(pady=20)
 
-# GUI
-pencere = tk.Tk()
-pencere.title("Akıllı Köpek Sesli Kontrol")
-pencere.geometry("500x600")
+    buton = tk.Button(pencere, text="🎙 Komut Söyle", command=butona_basildi, font=("Arial", 12), width=20, state="disabled")
+    buton.pack(pady=10)
 
-etiket = tk.Label(pencere, text="Butona basıp komut söyleyin.", font=("Arial", 14))
-etiket.pack(pady=20)
+    port_frame = tk.Frame(pencere)
+    port_frame.pack(pady=10)
 
-buton = tk.Button(pencere, text="🎙 Komut Söyle", command=butona_basildi, font=("Arial", 12), width=20)
-buton.pack(pady=10)
+    port_label = tk.Label(port_frame, text="🔌 Seri Port Seç:", font=("Arial", 11))
+    port_label.pack(side=tk.LEFT, padx=5)
 
-port_frame = tk.Frame(pencere)
-port_frame.pack(pady=10)
+    port_combo = ttk.Combobox(port_frame, width=20, state="readonly")
+    port_combo.pack(side=tk.LEFT)
+    port_combo.bind("<<ComboboxSelected>>", port_secildi)
 
-port_label = tk.Label(port_frame, text="🔌 Seri Port Seç:", font=("Arial", 11))
-port_label.pack(side=tk.LEFT, padx=5)
+    yenile_buton = tk.Button(port_frame, text="🔄 Yenile", command=seri_portlari_yenile)
+    yenile_buton.pack(side=tk.LEFT, padx=5)
 
-port_combo = ttk.Combobox(port_frame, width=20, state="readonly")
-port_combo.pack(side=tk.LEFT)
+    istatistik_buton = tk.Button(port_frame, text="📊 İstatistik", command=istatistikleri_yaz)
+    istatistik_buton.pack(side=tk.LEFT, padx=5)
 
-yenile_buton = tk.Button(port_frame, text="🔄 Yenile", command=seri_portlari_yenile)
-yenile_buton.pack(side=tk.LEFT, padx=5)
+    log_label = tk.Label(pencere, text="📜 Komut Geçmişi:", font=("Arial", 11))
+    log_label.pack()
 
-log_label = tk.Label(pencere, text="📜 Komut Geçmişi:", font=("Arial", 11))
-log_label.pack()
+    log_text = ScrolledText(pencere, width=60, height=10, state="disabled", font=("Consolas", 10))
+    log_text.pack(pady=5)
 
-log_text = ScrolledText(pencere, width=60, height=10, state="disabled", font=("Consolas", 10))
-log_text.pack(pady=5)
+    son_karakter_etiketi = tk.Label(pencere, text="⚪ Henüz komut gönderilmedi", font=("Arial", 12, "bold"), fg="blue")
+    son_karakter_etiketi.pack(pady=10)
 
-son_karakter_etiketi = tk.Label(pencere, text="⚪ Henüz komut gönderilmedi", font=("Arial", 12, "bold"), fg="blue")
-son_karakter_etiketi.pack(pady=10)
+    tasiyici = SerialTransport(on_sent=gonderim_bildirimi)
+    seri_portlari_yenile()
+    Thread(target=modeli_yukle, daemon=True).start()
+    Thread(target=tanima_iscisi, daemon=True).start()
+    pencere.after(100, model_durumunu_kontrol_et)
+    pencere.after(50, arayuz_kuyrugunu_isle)
+    pencere.mainloop()
 
-seri_portlari_yenile()
-pencere.mainloop()
+if __name__ == '__main__':
+    main()
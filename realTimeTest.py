@@ -4,83 +4,80 @@ Mikrofondan gerçek zamanlı çoklu komut tanıma.
 SPACE tuşuna basılı tutarak kayıt yapın; tuş bırakıldığında, kayıt 0.5 saniye daha devam eder,
 sonrasında ses sessizliklere göre segmentlere ayrılır ve her segment için komut tahmini yapılır.
 Tahmin edilen komutlar boşluklarla ayrılmış şekilde yazdırılır.
+
+--continuous ile eller serbest mod açılır: mikrofon sürekli dinlenir, sesler sabit boyutlu
+bir halka tampona yazılır ve her ifade biter bitmez komut tahmini yapılır.
 """
 
+import argparse
 import time
 import numpy as np
 import sounddevice as sd
 import librosa
 import keyboard
-import tensorflow as tf
 import logging
+from streaming import RingBuffer, Endpointer
+from feature_engine import SR, COMMANDS, DEFAULT_ENGINE
+from inference_backend import load_bundle
+import metrics
 
 # Loglama yapılandırması
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Parametreler (eğitim ayarlarıyla uyumlu olmalı)
-SR = 16000         # Örnekleme hızı
-N_MFCC = 40
-MAX_PAD_LEN = 44   # Eğitimde kullanılan ayar ile eşleşmeli
-COMMANDS = ['dur', 'duz_devam_et', 'geri_don', 'sag_don', 'sola_don']
-MODEL_PATH = 'sound_command_model_cpu_professional.h5'
+# Parametreler (eğitim ayarlarıyla uyumlu olmalı); SR ortak özellik motorundan gelir
+MODEL_PATH = 'sound_command_model_cpu_professional.h5'  # .tflite, model paketi dizini ya da çıkarım sunucusu adresi de verilebilir
 SILENCE_TOP_DB = 20  # Sessizlik tespiti için eşik değeri
 MIN_SEGMENT_LENGTH = 200  # Geçerli bir segment için minimum örnek sayısı
+RING_SECONDS = 5.0  # Sürekli modda halka tamponun tuttuğu ses süresi
+MAX_UTTERANCE_SECONDS = 2.0  # Sürekli modda bir ifadenin azami süresi
+POLL_INTERVAL = 0.02  # Sürekli modda halka tamponun kontrol aralığı (saniye)
 
 # Kayıt için global değişkenler
 recording = False
 audio_frames = []
 stream = None
+ring_buffer = None  # Sürekli modda kullanılan halka tampon
 
-# Eğitilmiş modeli yükle
-logging.info("Model yükleniyor: %s", MODEL_PATH)
-model = tf.keras.models.load_model(MODEL_PATH)
-logging.info("Model başarıyla yüklendi.")
+model = None  # main() içinde yüklenir
+engine = DEFAULT_ENGINE  # Model paketindeki MFCC ayarlarıyla değiştirilir
 
 def audio_callback(indata, frames, time_info, status):
     """
     Mikrofon verilerini toplamak için callback fonksiyonu.
     """
     global audio_frames
+    metrics.record_stream_status(status, frames)
     if status:
         logging.warning("Ses akışı durumu: %s", status)
-    audio_frames.append(indata.copy())
-
-def extract_features(audio, sr=SR):
-    """
-    Sesten normalize edilmiş MFCC özelliklerini çıkarır ve MAX_PAD_LEN'e göre pad/truncate işlemi yapar.
-    """
-    mfcc = librosa.feature.mfcc(y=audio, sr=sr, n_mfcc=N_MFCC)
-    mfcc = (mfcc - np.mean(mfcc, axis=1, keepdims=True)) / (np.std(mfcc, axis=1, keepdims=True) + 1e-10)
-    if mfcc.shape[1] < MAX_PAD_LEN:
-        pad_width = MAX_PAD_LEN - mfcc.shape[1]
-        mfcc = np.pad(mfcc, pad_width=((0, 0), (0, pad_width)), mode='constant')
+    if ring_buffer is not None:
+        ring_buffer.write(indata[:, 0])
     else:
-        mfcc = mfcc[:, :MAX_PAD_LEN]
-    return mfcc
+        audio_frames.append(indata.copy())
 
 def process_and_predict(audio_data):
     """
     Kaydedilen sesi işler, sessizliklere göre segmentlere ayırır ve her segment için komut tahmini yapar.
+    Tahmin edilen komutların listesini döndürür.
     """
     # Tüm ses verilerini birleştir ve normalize et
     audio = np.concatenate(audio_data, axis=0).flatten()
     logging.info("Toplam ses süresi: %.2f saniye", len(audio) / SR)
     
     # Sessizlik tespiti kullanılarak sesi segmentlere ayır
-    intervals = librosa.effects.split(audio, top_db=SILENCE_TOP_DB)
+    with metrics.timer('segmentation'):
+        intervals = librosa.effects.split(audio, top_db=SILENCE_TOP_DB)
     logging.info("Tespit edilen segment sayısı: %d", len(intervals))
     
+    # Segment özelliklerini yığınla ve modeli tek bir toplu çağrı ile çalıştır
+    segments = [audio[start:end] for start, end in intervals if end - start >= MIN_SEGMENT_LENGTH]
     predictions = []
-    for start, end in intervals:
-        if end - start < MIN_SEGMENT_LENGTH:
-            continue
-        segment = audio[start:end]
-        features = extract_features(segment, SR)
-        features = features[np.newaxis, ..., np.newaxis]  # Modelin beklediği forma dönüştür: (1, n_mfcc, MAX_PAD_LEN, 1)
-        
-        pred = model.predict(features)[0]
-        pred_idx = np.argmax(pred)
-        predictions.append(COMMANDS[pred_idx])
+    if segments:
+        with metrics.timer('features'):
+            batch = engine.batch(segments)  # Modelin beklediği form: (segmentler, n_mfcc, MAX_PAD_LEN, 1)
+        with metrics.timer('inference'):
+            preds = np.asarray(model.predict_on_batch(batch))
+        metrics.inc('commands', len(segments))
+        predictions = [COMMANDS[idx] for idx in np.argmax(preds, axis=1)]
     
     if predictions:
         result = " ".join(predictions)
@@ -89,6 +86,7 @@ def process_and_predict(audio_data):
     else:
         logging.info("Geçerli konuşma segmenti tespit edilmedi.")
         print("Geçerli konuşma segmenti tespit edilmedi.")
+    return predictions
 
 def start_recording():
     """
@@ -103,14 +101,15 @@ def start_recording():
 
 def stop_recording():
     """
-    Ek 0.5 saniye kayıttan sonra ses kaydını durdurur.
+    Ek 0.5 saniye kayıttan sonra ses kaydını durdurur ve tahmin edilen komutları döndürür.
     """
     global recording, stream
     time.sleep(0.5)
     stream.stop()
     recording = False
     logging.info("Kayıt durduruldu. Ses işleniyor...")
-    process_and_predict(audio_frames)
+    with metrics.timer('processing'):
+        return process_and_predict(audio_frames)
 
 def on_space_press(e):
     """
@@ -127,7 +126,87 @@ def on_space_release(e):
     if recording:
         stop_recording()
 
+def predict_utterance(segment):
+    """
+    Sürekli modda tamamlanan tek bir ifade için komut tahmini yapar.
+    """
+    with metrics.timer('features'):
+        features = engine.batch([segment])
+    with metrics.timer('inference'):
+        pred = np.asarray(model.predict_on_batch(features))[0]
+    metrics.inc('commands')
+    pred_idx = np.argmax(pred)
+    return COMMANDS[pred_idx], pred[pred_idx]
+
+def run_continuous():
+    """
+    Mikrofonu sürekli dinler; her ifade sona erdiğinde komutu hemen yazdırır.
+    """
+    global ring_buffer, stream
+    capacity = int(RING_SECONDS * SR)
+    ring_buffer = RingBuffer(capacity)
+    endpointer = Endpointer(SR, max_length=MAX_UTTERANCE_SECONDS)
+    read_pos = 0
+    stream = sd.InputStream(samplerate=SR, channels=1, callback=audio_callback)
+    stream.start()
+    logging.info("Sürekli dinleme başladı. Çıkmak için Ctrl+C.")
+    try:
+        while True:
+            total = ring_buffer.total_written
+            if total - read_pos > capacity:
+                # İşleme halkanın gerisinde kaldı; ezilen sesi atlayıp yeniden hizalan
+                logging.warning("Halka tampon taştı, %.2f saniye ses atlandı.", (total - capacity - read_pos) / SR)
+                metrics.inc('ring_overruns')
+                metrics.inc('ring_skipped_samples', total - capacity - read_pos)
+                read_pos = total - capacity
+                endpointer = Endpointer(SR, max_length=MAX_UTTERANCE_SECONDS, start=read_pos)
+            if total > read_pos:
+                new_samples = ring_buffer.read(read_pos, total)
+                read_pos = total
+                with metrics.timer('endpointing'):
+                    utterances = endpointer.push(new_samples)
+                for start, end in utterances:
+                    if end - start < MIN_SEGMENT_LENGTH:
+                        continue
+                    command, confidence = predict_utterance(ring_buffer.read(start, end))
+                    logging.info("Komut: %s (güven: %.2f, %.2fs-%.2fs)", command, confidence, start / SR, end / SR)
+                    print("Tahmin edilen komut:", command)
+            time.sleep(POLL_INTERVAL)
+    except KeyboardInterrupt:
+        logging.info("Sürekli dinleme sonlandırılıyor.")
+    finally:
+        stream.stop()
+        stream.close()
+        ring_buffer = None
+        log_metrics()
+
+def log_metrics():
+    """
+    Oturum boyunca toplanan aşama sürelerini ve sayaçları loglar.
+    """
+    for line in metrics.summary_lines():
+        logging.info("Ölçüm: %s", line)
+
 def main():
+    parser = argparse.ArgumentParser(description="Mikrofondan gerçek zamanlı çoklu komut tanıma.")
+    parser.add_argument('--continuous', action='store_true',
+                        help="SPACE tuşu yerine sürekli dinleme ile eller serbest mod")
+    parser.add_argument('--model', default=MODEL_PATH,
+                        help="Model dosyası (.h5/.tflite), model paketi dizini ya da çıkarım sunucusu adresi (http://127.0.0.1:8765)")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.configure_from_args(args)
+
+    # Eğitilmiş modeli yükle
+    global model, engine, COMMANDS
+    logging.info("Model yükleniyor: %s", args.model)
+    model, engine, commands = load_bundle(args.model)
+    COMMANDS = commands or COMMANDS
+    logging.info("Model başarıyla yüklendi.")
+    if args.continuous:
+        run_continuous()
+        return
+
     logging.info("Gerçek zamanlı çoklu komut tanıma başladı.")
     logging.info("Kayıt için SPACE tuşuna basılı tutun; komutları işlemek için SPACE tuşunu bırakın.")
     
@@ -142,6 +221,7 @@ def main():
         logging.info("Gerçek zamanlı tanıma sonlandırılıyor.")
     finally:
         keyboard.unhook_all()
+        log_metrics()
 
 if __name__ == '__main__':
     main()
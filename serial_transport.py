@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Robota komut baytlarını gönderen asenkron seri taşıyıcı.
+Seçili port için tek bir bağlantı tutar, yazma hatasında otomatik yeniden bağlanır ve
+komutları engellemeyen bir giden kuyruktan gönderir. Henüz gönderilmemiş hareket komutları
+yeni bir komut geldiğinde geçersiz sayılıp atılır (yalnızca en güncel komut gider).
+pyserial URL'leri desteklendiği için donanımsız olarak 'loop://' ile denenebilir.
+"""
+
+import collections
+import logging
+import threading
+import time
+import serial
+import metrics
+
+BAUDRATE = 9600
+RECONNECT_INTERVAL = 1.0  # Yeniden bağlanma denemeleri arasındaki süre (saniye)
+HISTORY_SIZE = 256  # Saklanan gönderim kaydı sayısı
+
+# timestamp duvar saatidir (time.time); süreler perf_counter farklarından hesaplanır.
+# Geçersiz sayılan komutlarda timestamp atılma anıdır, queue_wait ve write_duration None'dır.
+SendRecord = collections.namedtuple(
+    'SendRecord', ['command', 'timestamp', 'queue_wait', 'write_duration', 'superseded']
+)
+
+class SerialTransport:
+    """Tek port, tek bağlantı ve tek gönderici iş parçacığı ile seri komut taşıyıcı."""
+
+    def __init__(self, baudrate=BAUDRATE, write_timeout=1.0, on_sent=None):
+        self.baudrate = baudrate
+        self.write_timeout = write_timeout
+        self.on_sent = on_sent  # Gönderim sonrası çağrılır: on_sent(SendRecord) veya hata için on_sent(None)
+        self.port = None
+        self.history = collections.deque(maxlen=HISTORY_SIZE)
+        self.dropped = 0
+        self._serial = None
+        self._pending = collections.deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name='serial-transport', daemon=True)
+        self._thread.start()
+
+    @property
+    def is_open(self):
+        return self._serial is not None and self._serial.is_open
+
+    def open(self, port):
+        """Portu seçer ve bağlanır; önceki bağlantı kapatılır. Hata pyserial istisnası olarak yükselir."""
+        with self._cond:
+            self._close_serial()
+            self.port = port
+            self._connect()
+            self._cond.notify()
+
+    def send(self, command):
+        """Komutu engellemeden kuyruğa alır; bekleyen eski komutların yerini alır."""
+        now = time.perf_counter()
+        with self._cond:
+            while self._pending:
+                # Gönderilmemiş hareket komutları yeni komutla geçersizleşir
+                old_command, _ = self._pending.popleft()
+                self.history.append(SendRecord(old_command, time.time(), None, None, True))
+                self.dropped += 1
+                metrics.inc('serial_superseded')
+            self._pending.append((command, now))
+            self._cond.notify()
+
+    def close(self):
+        """Gönderici iş parçacığını durdurur ve portu kapatır."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout=2)
+        with self._cond:
+            self._close_serial()
+
+    def _connect(self):
+        self._serial = serial.serial_for_url(
+            self.port, baudrate=self.baudrate, timeout=1, write_timeout=self.write_timeout
+        )
+        logging.info("Seri port açıldı: %s", self.port)
+
+    def _close_serial(self):
+        if self._serial is not None:
+            try:
+                self._serial.close()
+            except serial.SerialException:
+                pass
+            self._serial = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and not (self._pending and self.port):
+                    self._cond.wait()
+                if self._closed:
+                    return
+                if self._serial is None:
+                    try:
+                        self._connect()
+                    except serial.SerialException as e:
+                        logging.warning("Seri port yeniden bağlanamadı (%s): %s", self.port, e)
+                        self._cond.wait(RECONNECT_INTERVAL)
+                        continue
+                command, queued_at = self._pending.popleft()
+                ser = self._serial
+            # Yazma kilit dışında yapılır; yavaş adaptörler send() çağrılarını bekletmez
+            start = time.perf_counter()
+            try:
+                ser.write(command.encode())
+                ser.flush()
+            except (serial.SerialException, OSError) as e:
+                logging.warning("Seri yazma hatası, yeniden bağlanılacak: %s", e)
+                metrics.inc('serial_errors')
+                with self._cond:
+                    if self._serial is ser:
+                        self._close_serial()
+                    if not self._pending:
+                        # Daha yeni bir komut gelmediyse başarısız komut yeniden denenir
+                        self._pending.appendleft((command, queued_at))
+                if self.on_sent:
+                    self.on_sent(None)
+                continue
+            end = time.perf_counter()
+            metrics.inc('serial_sent')
+            metrics.observe('serial_queue_wait', start - queued_at)
+            metrics.observe('serial_write', end - start)
+            record = SendRecord(command, time.time(), start - queued_at, end - start, False)
+            with self._cond:
+                self.history.append(record)
+            if self.on_sent:
+                self.on_sent(record)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Sürekli (eller serbest) komut algılama için akış yardımcıları.
+RingBuffer mikrofon bloklarını sabit boyutlu, önceden ayrılmış bir halkada tutar;
+Endpointer ise gelen örnekleri çerçeve çerçeve işleyerek konuşma başlangıç ve
+bitişlerini enerji ve sıfır geçiş oranı (ZCR) ile tespit eder. Bellek kullanımı oturum süresinden bağımsızdır.
+"""
+
+import threading
+import numpy as np
+
+class RingBuffer:
+    """Tek kanallı ses için sabit kapasiteli halka tampon. Konumlar mutlak örnek indeksidir."""
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._buffer = np.zeros(self.capacity, dtype=np.float32)
+        self._total = 0  # Şimdiye kadar yazılan toplam örnek sayısı
+        self._lock = threading.Lock()
+
+    @property
+    def total_written(self):
+        return self._total
+
+    def write(self, samples):
+        """Örnekleri halkaya yazar; kapasiteyi aşan eski veriler üzerine yazılır."""
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        n = len(samples)
+        if n == 0:
+            return
+        with self._lock:
+            if n > self.capacity:
+                samples = samples[-self.capacity:]
+            start = (self._total + n - len(samples)) % self.capacity
+            first = min(len(samples), self.capacity - start)
+            self._buffer[start:start + first] = samples[:first]
+            self._buffer[:len(samples) - first] = samples[first:]
+            self._total += n
+
+    def read(self, start, end):
+        """[start, end) mutlak aralığındaki örneklerin kopyasını döndürür; ezilmiş kısım atlanır."""
+        with self._lock:
+            start = max(start, self._total - self.capacity, 0)
+            end = min(end, self._total)
+            if end <= start:
+                return np.zeros(0, dtype=np.float32)
+            i, j = start % self.capacity, end % self.capacity
+            if i < j:
+                return self._buffer[i:j].copy()
+            return np.concatenate([self._buffer[i:], self._buffer[:j]])
+
+class Endpointer:
+    """
+    Enerji/ZCR tabanlı artımlı konuşma uç noktası tespiti. push() ile verilen örnekleri
+    frame_length'lik çerçevelere böler, kalan örnekleri bir sonraki çağrıya taşır ve
+    tamamlanan her ifade için mutlak (başlangıç, bitiş) örnek aralıklarını döndürür.
+    Sessizlik hangover süresini aşınca ya da ifade max_length'e ulaşınca ifade kapanır.
+
+    Gürültü tabanı ilk çerçeveden başlatılır ama initial_floor_db ile sınırlanır; böylece akış
+    konuşmayla başlasa da ilk ifade kaçmaz. Sessiz çerçeve içermeden max_length'e ulaşan bir
+    ifade tabanın fazla düşük kaldığını gösterir (sürekli gürültü); taban o ifadedeki en düşük
+    enerjiye yükseltilir.
+    """
+
+    def __init__(self, sr, frame_length=320, threshold_db=12.0, min_energy_db=-60.0, zcr_threshold=0.25,
+                 min_speech=0.06, hangover=0.3, max_length=2.0, pre_roll=0.1, start=0, initial_floor_db=-45.0):
+        self.frame_length = frame_length
+        self.threshold_db = threshold_db
+        self.zcr_threshold = zcr_threshold
+        self.min_energy_db = min_energy_db
+        self.initial_floor_db = initial_floor_db
+        self.min_speech_frames = max(1, int(min_speech * sr / frame_length))
+        self.hangover_frames = max(1, int(hangover * sr / frame_length))
+        self.max_samples = int(max_length * sr)
+        self.pre_roll = int(pre_roll * sr)
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._position = start  # Bir sonraki çerçevenin mutlak başlangıç indeksi
+        self._noise_floor = None
+        self._speech_frames = 0
+        self._silence_frames = 0
+        self._start = None
+        self._last_speech_end = None
+        self._utterance_min_db = None  # İfadedeki en düşük çerçeve enerjisi (tamamı konuşmaysa)
+        self._energy_db = None  # Son çerçevenin enerjisi (dB)
+
+    @property
+    def in_speech(self):
+        return self._start is not None
+
+    def is_speech(self, frame):
+        """Çerçevenin konuşma içerip içermediğine karar verir ve gürültü tabanını günceller."""
+        energy_db = 10 * np.log10(np.mean(frame ** 2) + 1e-10)
+        self._energy_db = energy_db
+        if self._noise_floor is None:
+            self._noise_floor = min(energy_db, self.initial_floor_db)
+        speech = energy_db > max(self._noise_floor + self.threshold_db, self.min_energy_db)
+        if not speech and self.zcr_threshold is not None:
+            # Ötümsüz sürtünmeli sesler (s, ş) düşük enerjili ama yüksek ZCR'lidir
+            zcr = np.mean(np.signbit(frame[1:]) != np.signbit(frame[:-1]))
+            speech = (zcr > self.zcr_threshold and
+                      energy_db > max(self._noise_floor + self.threshold_db / 2, self.min_energy_db))
+        if not speech:
+            # Gürültü tabanı sessiz çerçevelerde yavaşça takip edilir, düşüşlere hemen uyar
+            self._noise_floor = min(energy_db, 0.95 * self._noise_floor + 0.05 * energy_db)
+        return speech
+
+    def push(self, samples):
+        """Yeni örnekleri işler ve tamamlanan ifadelerin (başlangıç, bitiş) listesini döndürür."""
+        samples = np.concatenate([self._carry, np.asarray(samples, dtype=np.float32).reshape(-1)])
+        n_frames = len(samples) // self.frame_length
+        segments = []
+        for k in range(n_frames):
+            frame = samples[k * self.frame_length:(k + 1) * self.frame_length]
+            segment = self._step(frame)
+            if segment is not None:
+                segments.append(segment)
+        self._carry = samples[n_frames * self.frame_length:].copy()
+        return segments
+
+    def flush(self):
+        """Akış sonunda yarım kalan ifadeyi kapatır."""
+        if self._start is None:
+            return []
+        segment = (self._start, self._last_speech_end)
+        self._reset()
+        return [segment]
+
+    def _reset(self):
+        self._start = None
+        self._last_speech_end = None
+        self._speech_frames = 0
+        self._silence_frames = 0
+        self._utterance_min_db = None
+
+    def _step(self, frame):
+        frame_start = self._position
+        frame_end = frame_start + self.frame_length
+        self._position = frame_end
+        speech = self.is_speech(frame)
+
+        if self._start is None:
+            self._speech_frames = self._speech_frames + 1 if speech else 0
+            if self._speech_frames >= self.min_speech_frames:
+                onset = frame_end - self._speech_frames * self.frame_length
+                self._start = max(0, onset - self.pre_roll)
+                self._last_speech_end = frame_end
+                self._silence_frames = 0
+                self._utterance_min_db = self._energy_db
+            return None
+
+        if speech:
+            self._last_speech_end = frame_end
+            self._silence_frames = 0
+            if self._utterance_min_db is not None:
+                self._utterance_min_db = min(self._utterance_min_db, self._energy_db)
+        else:
+            self._silence_frames += 1
+            self._utterance_min_db = None
+        if self._silence_frames >= self.hangover_frames or frame_end - self._start >= self.max_samples:
+            if self._silence_frames == 0 and self._utterance_min_db is not None:
+                # Hiç sessiz çerçeve görülmedi: taban sürekli gürültünün altında kalmış olabilir
+                self._noise_floor = max(self._noise_floor, self._utterance_min_db)
+            segment = (self._start, self._last_speech_end)
+            self._reset()
+            return segment
+        return None
+
+def _self_check(sr=16000):
+    """Endpointer regresyon kontrolleri: python streaming.py"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(0.5 * sr)) / sr
+    tone = (0.3 * np.sin(2 * np.pi * 300 * t)).astype(np.float32)
+    silence = (0.001 * rng.standard_normal(sr)).astype(np.float32)
+
+    # Akış konuşmayla başlarsa ilk ifade kaçmamalı
+    endpointer = Endpointer(sr)
+    segments = endpointer.push(np.concatenate([tone, silence])) + endpointer.flush()
+    assert len(segments) == 1 and segments[0][0] == 0, segments
+
+    # Sessizlikten sonra gelen ifade
+    endpointer = Endpointer(sr)
+    segments = endpointer.push(np.concatenate([silence, tone, silence])) + endpointer.flush()
+    assert len(segments) == 1 and abs(segments[0][0] - sr) <= 0.1 * sr + 320, segments
+
+    # Sürekli yüksek gürültü en fazla bir max_length ifadesi üretmeli (taban kendini düzeltir)
+    noise = (0.05 * rng.standard_normal(10 * sr)).astype(np.float32)
+    endpointer = Endpointer(sr)
+    segments = endpointer.push(noise) + endpointer.flush()
+    assert len(segments) <= 1, segments
+    print("streaming: tüm kontroller geçti")
+
+if __name__ == '__main__':
+    _self_check()
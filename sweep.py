@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Özellik ve eğitim ayarları üzerinde paralel hiperparametre taraması.
+
+Her yapılandırma ayrı bir işçi süreçte, sabitlenmiş TensorFlow iş parçacığı sayısıyla
+eğitilir. Önce her benzersiz özellik yapılandırması için özellikler ortak önbelleğe
+(feature_cache) bir kez hesaplanır; yalnızca eğitim ayarları farklı olan yapılandırmalar
+aynı özellikleri önbellekten okur. Her sonuç, modeli ve MFCC parametrelerini içeren
+kendini tanımlayan bir model paketi (inference_backend.save_bundle) olarak kaydedilir;
+çıkarım betikleri paket dizinini model yolu olarak alabilir.
+
+Gecikme, paralel eğitimler birbirinin ölçümünü bozmasın diye havuz bittikten sonra ana süreçte
+sırayla ölçülür ve paketlere yazılır. Tamamlanmış paketler yeniden çalıştırmada atlanır;
+yarıda kalan tarama kaldığı yerden sürer.
+
+Kullanım:
+  python sweep.py --grid n_mfcc=20,40 max_pad_len=32,44 batch_size=16,32 --parallel 4
+  python sweep.py --configs sweep.json   # yapılandırma sözlüklerinden oluşan liste
+"""
+
+import os
+import argparse
+import hashlib
+import itertools
+import json
+import logging
+import multiprocessing
+import time
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+SWEEP_PATH = 'sweeps'
+RESULTS_FILE = 'sweep_results.json'
+CHECKPOINT_FILE = 'checkpoint.h5'
+
+# Özellik anahtarları önbelleği belirler; eğitim anahtarları yalnızca eğitimi etkiler.
+# Aralık anahtarları yalnızca ilgili arttırma seçiliyse etkilidir (bkz. effective_config).
+FEATURE_KEYS = ('n_mfcc', 'max_pad_len', 'pitch_range', 'stretch_range', 'speed_range', 'noise_snr_db',
+                'gain_db', 'max_shift', 'augment')
+TRAINING_KEYS = ('arch', 'width', 'depth', 'batch_size', 'learning_rate', 'epochs', 'patience')
+CONFIG_KEYS = FEATURE_KEYS + TRAINING_KEYS
+
+@lru_cache(maxsize=None)
+def _defaults():
+    # train_model TensorFlow'u yükler; işçilerde iş parçacığı ayarından önce içe aktarılmasın diye burada
+    import train_model
+    missing = set(train_model.FEATURE_CONFIG) - set(FEATURE_KEYS)
+    if missing:
+        raise RuntimeError("train_model.FEATURE_CONFIG ayarları taranamıyor: %s" % ', '.join(sorted(missing)))
+    architecture, width, depth = train_model.DEFAULT_VARIANT
+    config = {key: list(value) if isinstance(value, tuple) else value
+              for key, value in train_model.FEATURE_CONFIG.items()}
+    return {
+        **config,
+        'augment': list(train_model.AUGMENTATIONS),
+        'arch': architecture,
+        'width': width,
+        'depth': depth,
+        'batch_size': train_model.BATCH_SIZE,
+        'learning_rate': train_model.LEARNING_RATE,
+        'epochs': train_model.EPOCHS,
+        'patience': train_model.PATIENCE,
+    }
+
+def default_config():
+    """train_model varsayılanlarından türetilen tam yapılandırma (her çağrıda yeni kopya)."""
+    return {key: list(value) if isinstance(value, list) else value for key, value in _defaults().items()}
+
+def parse_value(key, text):
+    """Izgara değerini çözer: aralıklar 'a:b', arttırma listeleri 'pitch+speed' ('none': kapalı)."""
+    if key == 'augment':
+        return [] if text == 'none' else text.split('+')
+    if isinstance(_defaults()[key], list):
+        return [float(v) for v in text.split(':')]
+    return type(_defaults()[key])(text)
+
+def parse_grid(items):
+    """'anahtar=d1,d2' ifadelerinden tüm kombinasyonları üretir."""
+    axes = []
+    for item in items:
+        key, _, values = item.partition('=')
+        if key not in CONFIG_KEYS:
+            raise SystemExit("Bilinmeyen tarama anahtarı: %s (seçenekler: %s)" % (key, ', '.join(CONFIG_KEYS)))
+        axes.append([(key, parse_value(key, v)) for v in values.split(',')])
+    return [dict(default_config(), **dict(combo)) for combo in itertools.product(*axes)]
+
+def effective_config(config):
+    """
+    Seçili olmayan arttırmaların aralık ayarlarını yapılandırmadan çıkarır. Böylece yalnızca
+    kullanılmayan bir aralıkta ayrışan yapılandırmalar aynı ada sahip olur; aynı özellikler
+    iki kez hesaplanmaz ve aynı model iki kez eğitilmez.
+    """
+    import train_model
+    used = {train_model.AUGMENTATION_SETTINGS[name] for name in config['augment']
+            if name in train_model.AUGMENTATION_SETTINGS}
+    unused = set(train_model.AUGMENTATION_SETTINGS.values()) - used
+    return {key: value for key, value in config.items() if key not in unused}
+
+def config_name(config):
+    """Yapılandırmadan kararlı bir çalıştırma adı türetir (kaldığı yerden sürdürme için)."""
+    digest = hashlib.sha1(json.dumps(config, sort_keys=True).encode()).hexdigest()[:10]
+    return '%s_w%g_d%d_%s' % (config['arch'], config['width'], config['depth'], digest)
+
+def feature_overrides(config):
+    """Yapılandırmadaki özellik ayarlarını configure_features() argümanlarına dönüştürür."""
+    return {key: tuple(config[key]) if isinstance(config[key], list) else config[key]
+            for key in FEATURE_KEYS if key != 'augment' and key in config}
+
+def precompute_features(configs, args):
+    """Her benzersiz özellik yapılandırması için özellikleri ortak önbelleğe bir kez hesaplar."""
+    import train_model
+    unique = {json.dumps({k: c[k] for k in FEATURE_KEYS if k in c}, sort_keys=True): c for c in configs}
+    logging.info("%d yapılandırma, %d benzersiz özellik ayarı", len(configs), len(unique))
+    for config in unique.values():
+        train_model.configure_features(**feature_overrides(config))
+        train_model.load_data(data_path=args.data, cache_path=args.cache, workers=args.workers,
+                              augmentations=tuple(config['augment']), augment=bool(config['augment']),
+                              corpus_path=args.corpus)
+
+def _init_worker(threads):
+    """Eğitim işçisinde TensorFlow iş parçacıklarını, TensorFlow başlatılmadan önce sabitler."""
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+def run_config(name, config, run_dir, data_path, cache_path, corpus_path):
+    """
+    Tek bir yapılandırmayı eğitir, en iyi modeli paket olarak kaydeder ve metrikleri döndürür.
+    Gecikme burada ölçülmez (bkz. measure_latencies).
+    """
+    import numpy as np
+    import tensorflow as tf
+    from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint, ReduceLROnPlateau
+    import train_model
+    from inference_backend import save_bundle
+
+    # Etiket sırası tek bir listeden gelir; paket aynı sırayı kaydeder
+    commands = list(train_model.COMMANDS)
+    engine = train_model.configure_features(**feature_overrides(config))
+    x_train, x_val, y_train, y_val = train_model.load_data(
+        data_path=data_path, commands=commands, cache_path=cache_path, workers=1,
+        augmentations=tuple(config['augment']), augment=bool(config['augment']), corpus_path=corpus_path
+    )
+    model = train_model.build_model(x_train.shape[1:], len(commands), config['arch'],
+                                    config['width'], config['depth'])
+    model.compile(optimizer=tf.keras.optimizers.Adam(config['learning_rate']),
+                  loss='categorical_crossentropy', metrics=['accuracy'])
+    os.makedirs(run_dir, exist_ok=True)
+    checkpoint = os.path.join(run_dir, CHECKPOINT_FILE)
+    callbacks = [
+        EarlyStopping(monitor='val_loss', patience=config['patience'], restore_best_weights=True),
+        ModelCheckpoint(checkpoint, monitor='val_loss', save_best_only=True),
+        ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=max(1, config['patience'] // 2))
+    ]
+    start = time.perf_counter()
+    history = model.fit(x_train, y_train, batch_size=config['batch_size'], epochs=config['epochs'],
+                        validation_data=(x_val, y_val), callbacks=callbacks, verbose=0)
+    train_seconds = time.perf_counter() - start
+
+    best_model = tf.keras.models.load_model(checkpoint)
+    predictions = best_model.predict(x_val, verbose=0)
+    metrics = {
+        'params': int(best_model.count_params()),
+        'flops': train_model.count_flops(best_model),
+        'val_accuracy': float(np.mean(np.argmax(predictions, axis=1) == np.argmax(y_val, axis=1))),
+        'size_kb': os.path.getsize(checkpoint) / 1024,
+        'epochs_run': len(history.history['loss']),
+        'train_seconds': train_seconds,
+    }
+    save_bundle(run_dir, best_model, engine, commands, name=name, config=config, metrics=metrics)
+    os.remove(checkpoint)
+    return metrics
+
+def measure_latencies(results, out_path):
+    """
+    Gecikmesi ölçülmemiş paketlerin tek örneklik CPU gecikmesini, eğitim süreçleri bittikten
+    sonra ana süreçte sırayla ölçer; sonuçlara ve paketlerin bundle.json dosyasına yazar.
+    """
+    import train_model
+    from inference_backend import load_bundle, read_bundle, update_bundle
+    for result in results:
+        if 'error' in result or result.get('latency_ms_p50') is not None:
+            continue
+        run_dir = os.path.join(out_path, result['name'])
+        model, engine, _ = load_bundle(run_dir)
+        p50, p95 = train_model.measure_latency(model, (engine.n_mfcc, engine.max_pad_len, 1))
+        result.update(latency_ms_p50=p50, latency_ms_p95=p95)
+        update_bundle(run_dir, metrics=dict(read_bundle(run_dir)['metrics'], latency_ms_p50=p50, latency_ms_p95=p95))
+        logging.info("%s: gecikme p50 %.2f ms (p95 %.2f ms)", result['name'], p50, p95)
+
+def collect_configs(args):
+    configs = []
+    if args.configs:
+        with open(args.configs, encoding='utf-8') as f:
+            configs += [dict(default_config(), **c) for c in json.load(f)]
+    if args.grid or not configs:
+        configs += parse_grid(args.grid or [])
+    for config in configs:
+        unknown = set(config) - set(CONFIG_KEYS)
+        if unknown:
+            raise SystemExit("Bilinmeyen yapılandırma anahtarı: %s" % ', '.join(sorted(unknown)))
+    unique = {config_name(config): config for config in map(effective_config, configs)}
+    if len(unique) < len(configs):
+        logging.info("%d yapılandırma yalnızca kullanılmayan arttırma aralıklarında ayrışıyor; atlanıyor",
+                     len(configs) - len(unique))
+    return list(unique.values())
+
+def parse_args():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Özellik ve eğitim ayarları üzerinde paralel tarama.")
+    parser.add_argument('--grid', nargs='*', help="'anahtar=d1,d2' biçiminde eksenler (%s)" % ', '.join(CONFIG_KEYS))
+    parser.add_argument('--configs', help="Yapılandırma sözlüklerinden oluşan JSON listesi")
+    parser.add_argument('--data', default='data', help="Komut alt klasörlerini içeren veri dizini")
+    parser.add_argument('--corpus', help="Veri dizini yerine paketlenmiş korpustan oku")
+    parser.add_argument('--cache', default='feature_cache', help="Ortak özellik önbelleği dizini")
+    parser.add_argument('--out', default=SWEEP_PATH, help="Model paketlerinin yazılacağı dizin")
+    parser.add_argument('--parallel', type=int, default=max(1, cpus // 4), help="Eşzamanlı eğitim süreci sayısı")
+    parser.add_argument('--threads', type=int, help="Süreç başına TensorFlow iş parçacığı (varsayılan: çekirdek/paralel)")
+    parser.add_argument('--workers', type=int, default=cpus, help="Özellik ön hesaplaması için işçi süreç sayısı")
+    return parser.parse_args()
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    args = parse_args()
+    configs = collect_configs(args)
+    threads = args.threads or max(1, (os.cpu_count() or 1) // args.parallel)
+
+    from inference_backend import is_bundle, read_bundle
+    results, pending = [], []
+    for config in configs:
+        name = config_name(config)
+        run_dir = os.path.join(args.out, name)
+        if is_bundle(run_dir):
+            logging.info("Atlanıyor (tamamlanmış): %s", name)
+            results.append(dict(name=name, config=config, **read_bundle(run_dir)['metrics']))
+        else:
+            pending.append((name, config, run_dir))
+
+    if pending:
+        precompute_features([config for _, config, _ in pending], args)
+        logging.info("%d yapılandırma %d süreçte (süreç başına %d iş parçacığı) eğitiliyor",
+                     len(pending), args.parallel, threads)
+        # spawn: ana süreçte başlatılmış TensorFlow çatallanmaz, iş parçacığı ayarı işçide geçerli olur
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=args.parallel, mp_context=context,
+                                 initializer=_init_worker, initargs=(threads,)) as executor:
+            futures = {executor.submit(run_config, name, config, run_dir, args.data, args.cache, args.corpus):
+                       (name, config) for name, config, run_dir in pending}
+            for future in as_completed(futures):
+                name, config = futures[future]
+                try:
+                    metrics = future.result()
+                except Exception as e:
+                    logging.error("%s başarısız: %s", name, e)
+                    results.append({'name': name, 'config': config, 'error': str(e)})
+                    continue
+                logging.info("%s: doğruluk %.4f, %d parametre, %.0f s", name,
+                             metrics['val_accuracy'], metrics['params'], metrics['train_seconds'])
+                results.append(dict(name=name, config=config, **metrics))
+
+    measure_latencies(results, args.out)
+    results.sort(key=lambda r: -r.get('val_accuracy', -1))
+    os.makedirs(args.out, exist_ok=True)
+    with open(os.path.join(args.out, RESULTS_FILE), 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    logging.info("%-36s %9s %10s %8s", 'paket', 'doğruluk', 'param', 'p50 ms')
+    for r in results:
+        if 'error' in r:
+            logging.info("%-36s %9s", r['name'], 'hata')
+            continue
+        logging.info("%-36s %9.4f %10d %8.2f", r['name'], r['val_accuracy'], r['params'], r['latency_ms_p50'])
+    logging.info("Sonuçlar kaydedildi: %s", os.path.join(args.out, RESULTS_FILE))
+
+if __name__ == '__main__':
+    main()
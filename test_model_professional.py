@@ -2,87 +2,207 @@
 """
 Profesyonel çoklu komut test scripti: CPU üzerinde ses komut tanıma için.
 Bu script, bir ses dosyasını sessizliklere göre segmentlere ayırır ve her segment için komut tahmini yapar.
+
+--stream ile uzun kayıtlar (ör. saatlik görev kayıtları) dosya tamamen yüklenmeden blok blok
+okunur; segmentler Endpointer ile artımlı bulunur, tamamlandıkça toplu sınıflandırılır ve
+sonuçlar hemen yazdırılır (--jsonl ile satır başına bir JSON). Bellek kullanımı dosya
+uzunluğundan bağımsızdır.
 """
 
 import os
-import sys
+import argparse
+import json
 import numpy as np
 import librosa
-import tensorflow as tf
 import logging
+from feature_engine import SR, COMMANDS, DEFAULT_ENGINE
+from inference_backend import load_bundle
+from corpus import load_audio, open_corpus, SEPARATOR
+from streaming import RingBuffer, Endpointer
+import metrics
 
 # Loglama yapılandırması
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Parametreler (eğitim ayarlarıyla uyumlu olmalı)
-COMMANDS = ['dur', 'duz_devam_et', 'geri_don', 'sag_don', 'sola_don']
-N_MFCC = 40
-MAX_PAD_LEN = 44  # Eğitimde kullanılan uzunluk
-SR = 16000  # Örnekleme hızı
+# Parametreler (eğitim ayarlarıyla uyumlu olmalı); SR ortak özellik motorundan gelir
+MODEL_PATH = 'sound_command_model_cpu_professional.h5'
+MIN_SEGMENT_LENGTH = 200  # Geçerli bir segment için minimum örnek sayısı
+BLOCK_SECONDS = 5.0  # Akış modunda dosyadan bir seferde okunan ses süresi
+STREAM_BATCH_SIZE = 32  # Akış modunda bir çıkarım çağrısındaki en fazla segment
+# Akış modu segmentasyonu dosya modundaki librosa.effects.split ile uyumlu tutulur: split, 2048
+# örneklik (~0.13 s) çerçevelerle çalıştığı için bundan kısa boşlukları bölmez, daha uzunları böler.
+STREAM_HANGOVER = 0.1  # Akış modunda segmenti kapatan sessizlik süresi (saniye)
+MAX_UTTERANCE_SECONDS = 10.0  # Akış modunda bir segmentin azami süresi (yalnızca bellek sınırı)
 
-def extract_features(audio, sr=SR):
-    """
-    Ses verisinden normalize edilmiş MFCC özelliklerini çıkarır ve MAX_PAD_LEN'e göre pad/truncate işlemi yapar.
-    """
-    mfcc = librosa.feature.mfcc(y=audio, sr=sr, n_mfcc=N_MFCC)
-    mfcc = (mfcc - np.mean(mfcc, axis=1, keepdims=True)) / (np.std(mfcc, axis=1, keepdims=True) + 1e-10)
-    if mfcc.shape[1] < MAX_PAD_LEN:
-        pad_width = MAX_PAD_LEN - mfcc.shape[1]
-        mfcc = np.pad(mfcc, pad_width=((0, 0), (0, pad_width)), mode='constant')
-    else:
-        mfcc = mfcc[:, :MAX_PAD_LEN]
-    return mfcc
-
-def predict_commands(model, audio_path):
+def predict_commands(model, audio_path, engine=DEFAULT_ENGINE):
     """
     Verilen ses dosyasını yükler, sessizliklere göre segmentlere ayırır ve her segment için komut tahmini yapar.
     """
     logging.info("Ses dosyası yükleniyor: %s", audio_path)
-    audio, sr = librosa.load(audio_path, sr=SR)
+    with metrics.timer('load'):
+        audio, sr = load_audio(audio_path, sr=SR)  # 'korpus::komut/dosya.wav' kaynakları da desteklenir
     
     # Sessizliklere göre ses dosyasını böl. Gerekirse top_db değeri ayarlanabilir.
-    intervals = librosa.effects.split(audio, top_db=20)
+    with metrics.timer('segmentation'):
+        intervals = librosa.effects.split(audio, top_db=20)
     logging.info("Toplam %d segment bulundu.", len(intervals))
     
-    predictions = []
-    
+    # Segment özelliklerini tek bir dizide topla ve tek bir toplu çağrı ile sınıflandır
+    segments = []
     for i, (start, end) in enumerate(intervals):
         # Çok kısa segmentleri atla (eşik değeri gerektiğinde ayarlanabilir)
-        if end - start < 200:
+        if end - start < MIN_SEGMENT_LENGTH:
             continue
-        segment = audio[start:end]
-        features = extract_features(segment, sr)
-        features = features[np.newaxis, ..., np.newaxis]  # Modelin beklediği forma dönüştür: (1, n_mfcc, MAX_PAD_LEN, 1)
-        
-        pred = model.predict(features)[0]
+        segments.append((i, start, end))
+    if not segments:
+        return []
+
+    # Modelin beklediği form: (segmentler, n_mfcc, MAX_PAD_LEN, 1)
+    with metrics.timer('features'):
+        batch = engine.batch([audio[start:end] for _, start, end in segments])
+    with metrics.timer('inference'):
+        preds = model.predict_on_batch(batch)
+    metrics.inc('commands', len(segments))
+
+    predictions = []
+    for (i, start, end), pred in zip(segments, np.asarray(preds)):
         pred_idx = np.argmax(pred)
-        confidence = pred[pred_idx]
-        start_time = start / sr
-        end_time = end / sr
-        
         predictions.append({
             'segment': i + 1,
             'command': COMMANDS[pred_idx],
-            'confidence': confidence,
-            'start_time': start_time,
-            'end_time': end_time
+            'confidence': float(pred[pred_idx]),
+            'start_time': start / sr,
+            'end_time': end / sr
         })
     return predictions
 
+def read_blocks(audio_path, block_seconds=BLOCK_SECONDS):
+    """
+    Kaydı SR'de mono float32 bloklar halinde okur. Dosyalar soundfile ile blok blok çözülür ve
+    gerekirse soxr akış yeniden örnekleyicisi ile SR'ye çevrilir; korpus kayıtları bellek
+    eşlemesinden dilimlenir. Hiçbir anda bir bloktan fazlası bellekte tutulmaz.
+    """
+    block = int(block_seconds * SR)
+    if SEPARATOR in audio_path:
+        corpus_path, path = audio_path.split(SEPARATOR, 1)
+        corpus = open_corpus(corpus_path)
+        pcm = corpus.pcm(corpus.find(path))
+        for offset in range(0, len(pcm), block):
+            yield pcm[offset:offset + block].astype(np.float32) / 32767
+        return
+    import soundfile as sf
+    with sf.SoundFile(audio_path) as f:
+        resampler = None
+        if f.samplerate != SR:
+            import soxr
+            resampler = soxr.ResampleStream(f.samplerate, SR, 1, dtype='float32', quality='HQ')
+        for data in f.blocks(blocksize=int(block_seconds * f.samplerate), dtype='float32', always_2d=True):
+            data = data.mean(axis=1)
+            if resampler is not None:
+                data = resampler.resample_chunk(data)
+            yield data
+        if resampler is not None:
+            yield resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+
+def stream_commands(model, audio_path, block_seconds=BLOCK_SECONDS, batch_size=STREAM_BATCH_SIZE,
+                    engine=DEFAULT_ENGINE):
+    """
+    Kaydı blok blok okuyup segmentleri artımlı bulur ve tamamlanan segmentleri toplu sınıflandırır.
+    Segmentasyon librosa.effects.split yerine sürekli moddaki enerji/ZCR Endpointer ile yapılır;
+    blok sınırındaki yarım ifade bir sonraki bloğa taşınır. predict_commands ile aynı alanlara
+    sahip sözlükleri üretir (generator).
+
+    Hangover ve azami süre dosya modundaki bölmeye göre seçilmiştir; sık aralıklı komutlar
+    birleştirilmez. Kalan fark eşiktedir: split sessizliği tüm dosyanın tepe seviyesine göre
+    (top_db=20) belirler, akışta tepe önceden bilinmediği için Endpointer gürültü tabanına göre
+    karar verir. Bu yüzden segment sınırları birkaç çerçeve, çok kısık ifadelerin sayısı ise
+    farklı olabilir.
+    """
+    block = int(block_seconds * SR)
+    # Halka; bir blok ile en uzun ifade, ön kayıt ve hangover payını tutar
+    ring = RingBuffer(block + int((MAX_UTTERANCE_SECONDS + 2) * SR))
+    endpointer = Endpointer(SR, hangover=STREAM_HANGOVER, max_length=MAX_UTTERANCE_SECONDS, pre_roll=0)
+    pending = []
+    count = 0
+
+    def classify(items):
+        nonlocal count
+        with metrics.timer('features'):
+            batch = engine.batch([audio for _, _, audio in items])
+        with metrics.timer('inference'):
+            preds = np.asarray(model.predict_on_batch(batch))
+        metrics.inc('commands', len(items))
+        for (start, end, _), pred in zip(items, preds):
+            count += 1
+            pred_idx = np.argmax(pred)
+            yield {
+                'segment': count,
+                'command': COMMANDS[pred_idx],
+                'confidence': float(pred[pred_idx]),
+                'start_time': start / SR,
+                'end_time': end / SR
+            }
+
+    blocks = read_blocks(audio_path, block_seconds)
+    while True:
+        with metrics.timer('load'):
+            data = next(blocks, None)
+        if data is None:
+            break
+        ring.write(data)
+        with metrics.timer('endpointing'):
+            found = endpointer.push(data)
+        pending += [(start, end, ring.read(start, end)) for start, end in found if end - start >= MIN_SEGMENT_LENGTH]
+        # Her bloktan sonra biriken segmentler sınıflandırılır; ilk sonuçlar beklemeden gelir
+        while pending:
+            items, pending = pending[:batch_size], pending[batch_size:]
+            yield from classify(items)
+    pending = [(start, end, ring.read(start, end)) for start, end in endpointer.flush()
+               if end - start >= MIN_SEGMENT_LENGTH]
+    if pending:
+        yield from classify(pending)
+
+def print_prediction(pred, jsonl=False):
+    if jsonl:
+        print(json.dumps(pred, ensure_ascii=False), flush=True)
+        return
+    print(f"Segment {pred['segment']}: {pred['command']} (güven: {pred['confidence']:.2f}) "
+          f"{pred['start_time']:.2f}s ile {pred['end_time']:.2f}s arası", flush=True)
+
 def main():
-    # Komut satırında ses dosyası yolu verilmiş olmalı
-    if len(sys.argv) < 2:
-        print("Usage: python test_multi_command.py <path_to_audio_file>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description="Ses dosyasındaki komutları segmentlere ayırıp tahmin eder.")
+    parser.add_argument('audio', help="Ses dosyası ya da 'korpus::komut/dosya.wav' kaydı")
+    # Eğitilmiş model (.h5, nicemlenmiş .tflite, model paketi ya da çıkarım sunucusu adresi; isteğe bağlı ikinci argüman)
+    parser.add_argument('model', nargs='?', default=MODEL_PATH,
+                        help="model.h5 | model.tflite | model paketi dizini | http://host:port")
+    parser.add_argument('--stream', action='store_true',
+                        help="Uzun kayıtlar için dosyayı blok blok oku, sonuçları hemen yazdır")
+    parser.add_argument('--jsonl', action='store_true', help="Her sonucu tek satırlık JSON olarak yazdır")
+    parser.add_argument('--block-seconds', type=float, default=BLOCK_SECONDS, help="Akış modunda blok süresi")
+    parser.add_argument('--batch-size', type=int, default=STREAM_BATCH_SIZE,
+                        help="Akış modunda çıkarım başına en fazla segment")
+    metrics.add_arguments(parser)
+    args = parser.parse_args()
+    metrics.configure_from_args(args)
 
-    audio_path = sys.argv[1]
-    
-    # Eğitilmiş modeli yükle (dosya adının kaydedilen model ile eşleştiğinden emin olun)
-    model_path = 'sound_command_model_cpu_professional.h5'
-    logging.info("Model yükleniyor: %s", model_path)
-    model = tf.keras.models.load_model(model_path)
-    
-    predictions = predict_commands(model, audio_path)
+    global COMMANDS
+    logging.info("Model yükleniyor: %s", args.model)
+    model, engine, commands = load_bundle(args.model)
+    COMMANDS = commands or COMMANDS
+
+    if args.stream:
+        logging.info("Akış modunda işleniyor: %s", args.audio)
+        found = 0
+        for pred in stream_commands(model, args.audio, args.block_seconds, args.batch_size, engine):
+            print_prediction(pred, args.jsonl)
+            found += 1
+        if not found:
+            logging.info("Geçerli ses segmenti bulunamadı.")
+        for line in metrics.summary_lines():
+            logging.info("Ölçüm: %s", line)
+        return
+
+    predictions = predict_commands(model, args.audio, engine)
     
     if not predictions:
         logging.info("Geçerli ses segmenti bulunamadı.")
@@ -90,8 +210,9 @@ def main():
 
     logging.info("Tahmin edilen komutlar:")
     for pred in predictions:
-        print(f"Segment {pred['segment']}: {pred['command']} (güven: {pred['confidence']:.2f}) "
-              f"{pred['start_time']:.2f}s ile {pred['end_time']:.2f}s arası")
+        print_prediction(pred, args.jsonl)
+    for line in metrics.summary_lines():
+        logging.info("Ölçüm: %s", line)
         
 if __name__ == '__main__':
     main()
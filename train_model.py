@@ -6,18 +6,27 @@ oluşturulması ve eğitilmesi işlemlerini gerçekleştirir.
 """
 
 import os
+import argparse
+import hashlib
+import json
 import logging
-import random
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import librosa
 from sklearn.model_selection import train_test_split
 import tensorflow as tf
 from tensorflow.keras.models import Model
 from tensorflow.keras.layers import (
-    Input, Conv2D, BatchNormalization, Activation, MaxPooling2D, Dropout,
-    Flatten, Dense, add
+    Input, Conv2D, DepthwiseConv2D, BatchNormalization, Activation, MaxPooling2D, Dropout,
+    Flatten, Dense, GlobalAveragePooling2D, add
 )
 from tensorflow.keras.callbacks import EarlyStopping, ModelCheckpoint, ReduceLROnPlateau
+from feature_engine import SR, COMMANDS, N_MFCC, MAX_PAD_LEN, MfccEngine
+from inference_backend import TFLiteModel, save_bundle
+import augmentation
+from corpus import open_corpus, load_audio, SEPARATOR
 
 # TensorFlow'un sadece CPU kullanması için zorla
 os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
@@ -26,11 +35,88 @@ os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 # Parametreler
-COMMANDS = ['dur', 'duz_devam_et', 'geri_don', 'sag_don', 'sola_don']
-N_MFCC = 40
-MAX_PAD_LEN = 44  # Ses süresine göre ayarlayın
+# SR, N_MFCC ve MAX_PAD_LEN ortak özellik motorundan (feature_engine) gelir
 DATA_PATH = 'data'  # Her komut için alt klasörler içeren veri yolu
-SR = 16000  # Örnekleme hızı
+MODEL_PATH = 'sound_command_model_cpu_professional.h5'
+CALIBRATION_SAMPLES = 200  # int8 nicemleme kalibrasyonu için eğitim örneği sayısı
+BATCH_SIZE = 16
+EPOCHS = 100
+PATIENCE = 10  # Erken durdurma sabrı (epoch); öğrenme oranı bunun yarısında düşürülür
+SHUFFLE_BUFFER = 256  # Akış modunda arttırılmış klipler için karıştırma tamponu (klip sayısı)
+PITCH_RANGE = (-1, 1)  # Perde kaydırma aralığı (yarım ton)
+STRETCH_RANGE = (0.9, 1.1)  # Zaman germe oranı aralığı
+# Her dosya için orijinale ek olarak, listedeki her arttırma bir varyant üretir.
+# 'pitch' ve 'stretch' librosa faz vokoderini, diğerleri augmentation modülünü kullanır.
+# Varsayılan vektörel arttırmalardır: 'speed' perde ve tempoyu birlikte değiştirerek pitch +
+# stretch'in yerini alır; ses yükleme dahil dosya başına yaklaşık 2,5 kat daha ucuzdur.
+AUGMENTATIONS = ('speed', 'noise')
+LIBROSA_AUGMENTATIONS = ('pitch', 'stretch')
+AVAILABLE_AUGMENTATIONS = (LIBROSA_AUGMENTATIONS + augmentation.WAVEFORM_AUGMENTATIONS +
+                           augmentation.FEATURE_AUGMENTATIONS)
+ARCHITECTURES = ('resnet', 'ds_cnn', 'cnn_gap')  # resnet: özgün Flatten + Dense(256) başlıklı model
+DEFAULT_VARIANT = ('resnet', 1.0, 1)  # (mimari, genişlik, derinlik); MODEL_PATH'e kaydedilen özgün model
+VARIANT_REPORT = 'model_variants.json'  # Eğitilen varyantların boyut/hız/doğruluk karşılaştırması
+LATENCY_RUNS = 50  # CPU gecikme ölçümündeki tekrar sayısı
+CACHE_PATH = 'feature_cache'  # Hesaplanmış MFCC özelliklerinin saklandığı dizin
+CACHE_VERSION = 4  # Özellik hesaplama mantığı değiştiğinde artırın
+FILE_BATCH = 16  # Birlikte arttırılıp özellikleri çıkarılan dosya sayısı; büyük yığınlarda STFT ara dizileri önbelleğe sığmaz
+AUGMENT_SEED = 42  # Dosya başına veri arttırma tohumlarının türetildiği temel tohum
+LEARNING_RATE = 1e-3  # Adam'ın varsayılan öğrenme oranı; --perf modunda yığınla birlikte ölçeklenir
+PERF_BATCH_SCALE = 4  # --perf modunda yığın boyutu ve öğrenme oranı çarpanı
+WARMUP_EPOCHS = 3  # Ölçeklenmiş öğrenme oranına doğrusal ısınma süresi (epoch)
+INTER_OP_THREADS = 2  # --perf modunda bağımsız TensorFlow işlemlerini paralel çalıştıran iş parçacığı sayısı
+BF16_CPU_FLAGS = ('avx512_bf16', 'amx_bf16')  # bfloat16 karışık hassasiyetin hızlandığı CPU özellikleri
+
+# Taranabilir özellik ayarları (sweep.py); configure_features() ile süreç başına değiştirilir.
+# Değerler feature_params() üzerinden önbellek anahtarına girer; arttırma aralıkları yalnızca
+# ilgili arttırma seçiliyse girer.
+FEATURE_CONFIG = {
+    'n_mfcc': N_MFCC,
+    'max_pad_len': MAX_PAD_LEN,
+    'pitch_range': PITCH_RANGE,
+    'stretch_range': STRETCH_RANGE,
+    'speed_range': augmentation.SPEED_RANGE,
+    'noise_snr_db': augmentation.NOISE_SNR_DB,
+    'gain_db': augmentation.GAIN_DB,
+    'max_shift': augmentation.MAX_SHIFT,
+}
+# Her arttırmanın FEATURE_CONFIG'teki aralık ayarı
+AUGMENTATION_SETTINGS = {
+    'pitch': 'pitch_range',
+    'stretch': 'stretch_range',
+    'speed': 'speed_range',
+    'noise': 'noise_snr_db',
+    'gain': 'gain_db',
+    'shift': 'max_shift',
+}
+_engine = MfccEngine(n_mfcc=N_MFCC, max_pad_len=MAX_PAD_LEN)
+
+def configure_features(**overrides):
+    """Özellik ayarlarını günceller ve MFCC motorunu yeniden kurar; motoru döndürür."""
+    global _engine
+    unknown = set(overrides) - set(FEATURE_CONFIG)
+    if unknown:
+        raise ValueError("Bilinmeyen özellik ayarı: %s" % ', '.join(sorted(unknown)))
+    FEATURE_CONFIG.update(overrides)
+    _engine = MfccEngine(n_mfcc=FEATURE_CONFIG['n_mfcc'], max_pad_len=FEATURE_CONFIG['max_pad_len'])
+    return _engine
+
+def augment_setting(name):
+    """Arttırmanın geçerli aralık ayarı (FEATURE_CONFIG'ten); ayarı olmayanlar için None."""
+    key = AUGMENTATION_SETTINGS.get(name)
+    return None if key is None else FEATURE_CONFIG[key]
+
+def augment_settings(augmentations):
+    """Seçili arttırmaların aralık ayarları; önbellek anahtarına ve model paketlerine yazılır."""
+    settings = {}
+    for name in augmentations:
+        if name in AUGMENTATION_SETTINGS:
+            value = augment_setting(name)
+            settings[AUGMENTATION_SETTINGS[name]] = list(value) if isinstance(value, (list, tuple)) else value
+    return settings
+
+def feature_shape():
+    return (FEATURE_CONFIG['n_mfcc'], FEATURE_CONFIG['max_pad_len'], 1)
 
 def augment_pitch(audio, sr, n_steps):
     """Pitch shift (perde değiştirme) veri arttırma uygulaması."""
@@ -40,48 +126,343 @@ def augment_time_stretch(audio, rate):
     """Zaman germe (time stretch) veri arttırma uygulaması."""
     return librosa.effects.time_stretch(y=audio, rate=rate)
 
-def extract_features(audio, sr=SR):
-    """Sesten normalize edilmiş MFCC özelliklerini çıkarır."""
-    mfcc = librosa.feature.mfcc(y=audio, sr=sr, n_mfcc=N_MFCC)
-    mfcc = (mfcc - np.mean(mfcc, axis=1, keepdims=True)) / (np.std(mfcc, axis=1, keepdims=True) + 1e-10)
-    if mfcc.shape[1] < MAX_PAD_LEN:
-        pad_width = MAX_PAD_LEN - mfcc.shape[1]
-        mfcc = np.pad(mfcc, pad_width=((0, 0), (0, pad_width)), mode='constant')
+def file_seed(file_path):
+    """Dosya yolundan, çalıştırma ve işçi sayısından bağımsız bir veri arttırma tohumu türetir."""
+    file_path = file_path.split(SEPARATOR)[-1].replace('/', os.sep)
+    relative = os.path.join(os.path.basename(os.path.dirname(file_path)), os.path.basename(file_path))
+    return zlib.crc32(relative.encode()) ^ AUGMENT_SEED
+
+def augment_clip(audio, name, rng):
+    """Tek bir klibe librosa tabanlı arttırmayı ('pitch' ya da 'stretch') uygular (rng: np.random.Generator)."""
+    if name == 'pitch':
+        return augment_pitch(audio, SR, rng.uniform(*FEATURE_CONFIG['pitch_range']))
+    if name == 'stretch':
+        return augment_time_stretch(audio, rng.uniform(*FEATURE_CONFIG['stretch_range']))
+    raise ValueError("Klip başına arttırma yalnızca %s için: %s" % (', '.join(LIBROSA_AUGMENTATIONS), name))
+
+def check_augmentations(augmentations):
+    """Bilinmeyen arttırma adları için ValueError yükseltir."""
+    unknown = set(augmentations) - set(AVAILABLE_AUGMENTATIONS)
+    if unknown:
+        raise ValueError("Bilinmeyen veri arttırma: %s (seçenekler: %s)"
+                         % (', '.join(sorted(unknown)), ', '.join(AVAILABLE_AUGMENTATIONS)))
+
+def process_files(file_paths, sr=SR, augment=True, seeds=None, augmentations=AUGMENTATIONS):
+    """
+    Ses dosyalarını (ya da 'korpus::komut/dosya.wav' kaynaklarını) yükler ve opsiyonel veri
+    arttırma ile özellik çıkarımı yapar; (dosya, 1 + arttırma, n_mfcc, MAX_PAD_LEN) döndürür.
+    Vektörel arttırmalar ve özellik çıkarımı tüm dosyalar için yığın halinde yapılır. Her dosyanın
+    rastgele değerleri kendi tohumundan (varsayılan: file_seed) çekildiği için sonuç, dosyanın
+    hangi yığında işlendiğinden bağımsızdır.
+    """
+    audios = [load_audio(file_path, sr=sr)[0] for file_path in file_paths]
+    augmentations = augmentations if augment else ()
+    seeds = [file_seed(file_path) for file_path in file_paths] if seeds is None else seeds
+    rngs = [np.random.default_rng(seed) for seed in seeds]
+    variants = [audios]
+    for name in augmentations:
+        if name in augmentation.FEATURE_AUGMENTATIONS:
+            # SpecAugment özellikler üzerinde uygulanır; dalga formu değişmeden kalır
+            variants.append(audios)
+        elif name in LIBROSA_AUGMENTATIONS:
+            variants.append([augment_clip(audio, name, rng) for audio, rng in zip(audios, rngs)])
+        else:
+            clips, lengths = augmentation.augment_batch(name, *augmentation.pad_batch(audios),
+                                                        augmentation.RowGenerators(rngs), augment_setting(name))
+            variants.append([clip[:length] for clip, length in zip(clips, lengths)])
+    # Orijinal ve arttırılmış klipler tek bir vektörel geçişte işlenir
+    features = _engine.batch([clip for clips in variants for clip in clips])[..., 0]
+    features = features.reshape((len(variants), len(audios)) + features.shape[1:])
+    for index, name in enumerate(augmentations, 1):
+        if name in augmentation.FEATURE_AUGMENTATIONS:
+            features[index] = augmentation.spec_augment(features[index], augmentation.RowGenerators(rngs))
+    return features.swapaxes(0, 1)
+
+def process_file(file_path, sr=SR, augment=True, seed=None, augmentations=AUGMENTATIONS):
+    """Tek dosya için process_files; (1 + arttırma, n_mfcc, MAX_PAD_LEN) döndürür."""
+    return process_files([file_path], sr, augment, None if seed is None else [seed], augmentations)[0]
+
+def feature_params(augment=True, augmentations=AUGMENTATIONS):
+    """
+    Önbellek anahtarına giren özellik çıkarım parametrelerini döndürür. Arttırma aralıkları
+    yalnızca ilgili arttırma seçiliyse girer; seçili olmayan bir aralığın değişmesi aynı
+    özellikleri farklı bir anahtar altında yeniden hesaplatmaz.
+    """
+    augmentations = list(augmentations) if augment else []
+    params = {
+        'version': CACHE_VERSION,
+        'librosa': librosa.__version__,  # Ses yükleme ve veri arttırma için
+        'sr': SR,
+        'n_mfcc': FEATURE_CONFIG['n_mfcc'],
+        'max_pad_len': FEATURE_CONFIG['max_pad_len'],
+        'augmentations': augmentations,
+        'augment_seed': AUGMENT_SEED,
+    }
+    params.update(augment_settings(augmentations))
+    if 'specaugment' in augmentations:
+        params['spec_masks'] = (augmentation.FREQ_MASK, augmentation.TIME_MASK)
+    return params
+
+def feature_cache_key(file_path, augment=True, augmentations=AUGMENTATIONS):
+    """
+    Dosya (ya da korpus kaydı) içeriğinin özeti ve özellik parametrelerinden önbellek anahtarı üretir.
+    Veri arttırma tohumu dosya yolundan türetildiği için arttırmalı özelliklerde tohum da anahtara
+    girer; aynı içerikli iki dosya farklı arttırılmış özellikleri paylaşmaz.
+    """
+    hasher = hashlib.sha1()
+    if SEPARATOR in file_path:
+        corpus_path, path = file_path.split(SEPARATOR, 1)
+        corpus = open_corpus(corpus_path)
+        hasher.update(b'corpus')
+        hasher.update(corpus.pcm(corpus.find(path)).tobytes())
     else:
-        mfcc = mfcc[:, :MAX_PAD_LEN]
-    return mfcc
-
-def process_file(file_path, sr=SR, augment=True):
-    """Ses dosyasını yükler ve opsiyonel veri arttırma ile özellik çıkarımı yapar."""
-    audio, _ = librosa.load(file_path, sr=sr)
-    features = [extract_features(audio, sr)]
-    if augment:
-        n_steps = random.uniform(-1, 1)
-        audio_pitch = augment_pitch(audio, sr, n_steps)
-        features.append(extract_features(audio_pitch, sr))
-        rate = random.uniform(0.9, 1.1)
-        audio_stretch = augment_time_stretch(audio, rate)
-        features.append(extract_features(audio_stretch, sr))
-    return features
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                hasher.update(chunk)
+    hasher.update(json.dumps(feature_params(augment, augmentations), sort_keys=True).encode())
+    if augment and augmentations:
+        hasher.update(b'seed:%d' % file_seed(file_path))
+    return hasher.hexdigest()
+
+def cached_process_files(file_paths, cache_path=CACHE_PATH, augment=True, augmentations=AUGMENTATIONS):
+    """
+    Her dosyanın özelliklerini önbellekten bellek eşlemeli (mmap) olarak okur; önbellekte
+    olmayanları tek bir process_files yığınında hesaplayıp (örnekler, n_mfcc, MAX_PAD_LEN)
+    şeklinde kaydeder. Dosya sırasıyla bir dizi listesi döndürür.
+    """
+    if not cache_path:
+        return list(np.asarray(process_files(file_paths, augment=augment, augmentations=augmentations),
+                               dtype=np.float32))
+    results, missing = [], []
+    for file_path in file_paths:
+        key = feature_cache_key(file_path, augment, augmentations)
+        cache_file = os.path.join(cache_path, key[:2], key + '.npy')
+        if os.path.exists(cache_file):
+            results.append(np.load(cache_file, mmap_mode='r'))
+        else:
+            results.append(None)
+            missing.append((len(results) - 1, file_path, cache_file))
+    if missing:
+        computed = process_files([file_path for _, file_path, _ in missing], augment=augment,
+                                 augmentations=augmentations)
+        for (index, _, cache_file), feats in zip(missing, np.asarray(computed, dtype=np.float32)):
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            # Yarım kalmış yazımlar önbelleği bozmasın diye önce geçici dosyaya yaz
+            tmp_file = '%s.%d.tmp.npy' % (cache_file[:-4], os.getpid())
+            np.save(tmp_file, feats)
+            os.replace(tmp_file, cache_file)
+            results[index] = feats
+    return results
+
+def cached_process_file(file_path, cache_path=CACHE_PATH, augment=True, augmentations=AUGMENTATIONS):
+    """Tek dosya için cached_process_files."""
+    return cached_process_files([file_path], cache_path, augment, augmentations)[0]
 
-def load_data(data_path=DATA_PATH, commands=COMMANDS, augment=True):
-    """Alt dizinlerden veri yükler ve veri arttırma uygular."""
-    data, labels = [], []
+def list_audio_files(data_path=DATA_PATH, commands=COMMANDS):
+    """Komut alt klasörlerindeki .wav dosyalarını ve etiket indekslerini listeler."""
+    file_paths, file_labels = [], []
     for label, command in enumerate(commands):
         folder = os.path.join(data_path, command)
+        if not os.path.isdir(folder):
+            logging.warning("'%s' komutu için klasör bulunamadı, atlanıyor: %s", command, folder)
+            continue
         logging.info("'%s' komutu için '%s' klasöründen işleniyor", command, folder)
-        for filename in os.listdir(folder):
+        for filename in sorted(os.listdir(folder)):
             if filename.endswith('.wav'):
-                file_path = os.path.join(folder, filename)
-                feats = process_file(file_path, augment=augment)
-                for feat in feats:
-                    data.append(feat)
-                    labels.append(label)
+                file_paths.append(os.path.join(folder, filename))
+                file_labels.append(label)
+    return file_paths, file_labels
+
+def list_corpus_files(corpus_path, commands=COMMANDS):
+    """Korpustaki kayıtları 'korpus::komut/dosya.wav' kaynakları ve etiket indeksleri olarak listeler."""
+    corpus = open_corpus(corpus_path)
+    logging.info("'%s' korpusundan %d kayıt okunuyor", corpus_path, len(corpus))
+    file_paths, file_labels = [], []
+    for entry in corpus.entries:
+        if entry['command'] in commands:
+            file_paths.append(corpus_path + SEPARATOR + entry['path'])
+            file_labels.append(commands.index(entry['command']))
+    return file_paths, file_labels
+
+def _process_job(job):
+    """İşçi süreçte bir dosya yığınının özelliklerini üretir (ProcessPoolExecutor için)."""
+    file_paths, cache_path, augment, augmentations, config = job
+    if config != FEATURE_CONFIG:
+        # Ana süreçteki özellik ayarları işçiye de uygulanır (spawn/forkserver başlatmada gerekli)
+        configure_features(**config)
+    return [np.asarray(feats) for feats in cached_process_files(file_paths, cache_path, augment, augmentations)]
+
+def load_data(data_path=DATA_PATH, commands=COMMANDS, augment=True, cache_path=CACHE_PATH, workers=1,
+              augmentations=AUGMENTATIONS, corpus_path=None):
+    """
+    Alt dizinlerden (ya da corpus_path verilirse paketlenmiş korpustan) veri yükler ve veri
+    arttırma uygular; özellikler önbellekten okunur.
+    augmentations, her dosya için üretilecek arttırılmış varyantları seçer.
+    Dosyalar FILE_BATCH'lik yığınlar halinde işlenir; workers > 1 ise yığınlar bir süreç
+    havuzuna dağıtılır. Veri arttırma tohumları dosya başına türetildiği için sonuçlar yığın
+    boyutundan ve işçi sayısından bağımsızdır.
+    """
+    if corpus_path:
+        file_paths, file_labels = list_corpus_files(corpus_path, commands)
+    else:
+        file_paths, file_labels = list_audio_files(data_path, commands)
+
+    # Her dosya sabit sayıda örnek üretir; çıktı dizisi baştan ayrılır ve sonuçlar geldikçe doldurulur
+    check_augmentations(augmentations)
+    per_file = 1 + len(augmentations) if augment else 1
+    data = np.empty((len(file_paths) * per_file,) + feature_shape(), dtype=np.float32)
+    labels = np.repeat(np.array(file_labels, dtype=np.int64), per_file)
+    # İşçi başına birkaç yığın düşsün diye yığınlar küçük veri kümelerinde FILE_BATCH'ten kısalır
+    batch = max(1, min(FILE_BATCH, -(-len(file_paths) // (max(workers, 1) * 4))))
+    jobs = [(file_paths[i:i + batch], cache_path, augment, augmentations, dict(FEATURE_CONFIG))
+            for i in range(0, len(file_paths), batch)]
+    if workers > 1:
+        logging.info("%d dosya %d yığında, %d işçi süreçle işleniyor", len(file_paths), len(jobs), workers)
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(_process_job, jobs)
+    else:
+        executor = None
+        results = (cached_process_files(*job[:4]) for job in jobs)
+    try:
+        # Şekil: (örnekler, n_mfcc, max_pad_len, 1); mmap dizilerden tek seferde kopyalanır
+        for i, feats in enumerate(feats for chunk in results for feats in chunk):
+            data[i * per_file:(i + 1) * per_file, ..., 0] = feats
+    finally:
+        if executor is not None:
+            executor.shutdown()
     logging.info("Veri yükleme tamamlandı. İşlenen örnek sayısı: %d", len(data))
-    data = np.array(data)[..., np.newaxis]  # Şekil: (örnekler, n_mfcc, MAX_PAD_LEN, 1)
-    labels = tf.keras.utils.to_categorical(np.array(labels), num_classes=len(commands))
+    labels = tf.keras.utils.to_categorical(labels, num_classes=len(commands))
     return train_test_split(data, labels, test_size=0.2, random_state=42)
 
+def _decode_audio(file_path):
+    """tf.data eşleme adımı: dosyayı SR örnekleme hızında çözer (korpus kaynakları çözülmeden okunur)."""
+    audio, _ = load_audio(file_path.decode(), sr=SR)
+    return audio.astype(np.float32)
+
+def _augment_variant(audio, variant, augmentations):
+    """
+    tf.data eşleme adımı: librosa tabanlı arttırmaları klip başına uygular (0 orijinaldir).
+    Vektörel arttırmalar yığınlama sonrasında _batch_augment içinde yapılır.
+    """
+    if variant > 0:
+        name = augmentations[variant - 1].decode()
+        if name in LIBROSA_AUGMENTATIONS:
+            audio = augment_clip(audio, name, np.random.default_rng())
+    return audio.astype(np.float32), np.int64(len(audio))
+
+def _batch_augment(audio, lengths, variants, augmentations):
+    """tf.data eşleme adımı: hızlı dalga formu arttırmalarını ilgili satırlara yığın halinde uygular."""
+    rng = np.random.default_rng()
+    rows, out_lengths = list(audio), lengths.copy()
+    for index, name in enumerate(augmentations, 1):
+        name = name.decode()
+        selected = np.flatnonzero(variants == index)
+        if name not in augmentation.WAVEFORM_AUGMENTATIONS or not len(selected):
+            continue
+        clips, new_lengths = augmentation.augment_batch(name, audio[selected], lengths[selected], rng,
+                                                        augment_setting(name))
+        for i, clip, length in zip(selected, clips, new_lengths):
+            rows[i], out_lengths[i] = clip, length
+    width = max(out_lengths.max(initial=1), 1)
+    out = np.zeros((len(rows), width), dtype=np.float32)
+    for i, (row, length) in enumerate(zip(rows, out_lengths)):
+        out[i, :length] = row[:length]
+    return out, out_lengths
+
+def _batch_features(audio, lengths, variants, augmentations):
+    """tf.data eşleme adımı: pad'lenmiş ses yığınından özellikleri tek geçişte hesaplar."""
+    features = _engine.batch(audio, lengths)
+    for index, name in enumerate(augmentations, 1):
+        selected = np.flatnonzero(variants == index)
+        if name.decode() in augmentation.FEATURE_AUGMENTATIONS and len(selected):
+            features[selected] = augmentation.spec_augment(features[selected], np.random.default_rng())
+    return features
+
+def make_dataset(file_paths, file_labels, num_classes, batch_size=BATCH_SIZE, augment=True, shuffle=True,
+                 augmentations=AUGMENTATIONS):
+    """
+    Ses dosyalarından akışlı bir tf.data girdisi kurar: çözme ve veri arttırma paralel eşleme
+    adımlarında, özellik çıkarımı yığın halinde yapılır ve eğitimle örtüşecek şekilde önceden
+    getirilir. Veri arttırma her epoch yeniden örneklenir; bellek kullanımı veri kümesi
+    boyutuna değil yığın ve tampon boyutuna bağlıdır.
+    """
+    check_augmentations(augmentations)
+    augmentations = tuple(augmentations) if augment else ()
+    names = tf.constant(augmentations or ('',))  # numpy_function boş tensör kabul etmez
+    autotune = tf.data.AUTOTUNE
+    ds = tf.data.Dataset.from_tensor_slices((file_paths, np.asarray(file_labels, dtype=np.int64)))
+    if shuffle:
+        ds = ds.shuffle(len(file_paths), reshuffle_each_iteration=True)
+    ds = ds.map(lambda path, label: (tf.numpy_function(_decode_audio, [path], tf.float32), label),
+                num_parallel_calls=autotune)
+    # Her dosya, önceden hesaplanan moddaki gibi orijinal + arttırma başına bir varyant üretir
+    variants = tf.range(1 + len(augmentations), dtype=tf.int64)
+    ds = ds.flat_map(lambda audio, label: tf.data.Dataset.from_tensor_slices(variants).map(
+        lambda variant: (audio, label, variant)))
+    def augment_fn(audio, label, variant):
+        audio, length = tf.numpy_function(_augment_variant, [audio, variant, names], (tf.float32, tf.int64))
+        audio.set_shape([None])
+        length.set_shape([])
+        return audio, length, label, variant
+    ds = ds.map(augment_fn, num_parallel_calls=autotune)
+    if shuffle and augment:
+        ds = ds.shuffle(SHUFFLE_BUFFER)
+    ds = ds.padded_batch(batch_size, padded_shapes=([None], [], [], []))
+    def features_fn(audio, lengths, labels, variants):
+        audio, lengths = tf.numpy_function(_batch_augment, [audio, lengths, variants, names],
+                                           (tf.float32, tf.int64))
+        features = tf.numpy_function(_batch_features, [audio, lengths, variants, names], tf.float32)
+        features.set_shape((None,) + feature_shape())
+        return features, tf.one_hot(labels, num_classes)
+    ds = ds.map(features_fn, num_parallel_calls=autotune)
+    return ds.prefetch(autotune)
+
+def load_streaming_data(data_path=DATA_PATH, commands=COMMANDS, batch_size=BATCH_SIZE, augment=True,
+                        augmentations=AUGMENTATIONS, corpus_path=None):
+    """
+    Dosya düzeyinde eğitim/doğrulama ayrımı yapıp akışlı tf.data kümelerini ve epoch başına
+    eğitim örneği sayısını döndürür.
+    """
+    if corpus_path:
+        file_paths, file_labels = list_corpus_files(corpus_path, commands)
+    else:
+        file_paths, file_labels = list_audio_files(data_path, commands)
+    train_paths, val_paths, train_labels, val_labels = train_test_split(
+        file_paths, file_labels, test_size=0.2, random_state=42
+    )
+    logging.info("Akış modu: %d eğitim, %d doğrulama dosyası", len(train_paths), len(val_paths))
+    train_ds = make_dataset(train_paths, train_labels, len(commands), batch_size, augment=augment,
+                            augmentations=augmentations)
+    val_ds = make_dataset(val_paths, val_labels, len(commands), batch_size, augment=False, shuffle=False)
+    # Her dosya orijinal + arttırma başına bir örnek verir; epoch başına gerçek örnek sayısı
+    train_samples = len(train_paths) * (1 + (len(augmentations) if augment else 0))
+    return train_ds, val_ds, train_samples
+
+def dataset_to_arrays(ds, max_batches=None):
+    """Bir tf.data kümesinin ilk yığınlarından (özellik, etiket) dizileri toplar (kalibrasyon için)."""
+    if max_batches is not None:
+        ds = ds.take(max_batches)
+    xs, ys = zip(*((x.numpy(), y.numpy()) for x, y in ds))
+    return np.concatenate(xs), np.concatenate(ys)
+
+def validation_batches(val, batch_size=1024):
+    """Doğrulama verisini (x, y) yığınları halinde verir; val bir tf.data kümesi ya da (x, y) dizileridir."""
+    if isinstance(val, tf.data.Dataset):
+        for x, y in val:
+            yield x.numpy(), y.numpy()
+        return
+    x, y = val
+    for i in range(0, len(x), batch_size):
+        yield x[i:i + batch_size], y[i:i + batch_size]
+
+def predict_classes(model, val):
+    """Doğrulama verisi için tahmin ve gerçek sınıf indekslerini yığın yığın toplar (tüm küme belleğe alınmaz)."""
+    predicted, true = [], []
+    for x, y in validation_batches(val):
+        predicted.append(np.argmax(model.predict_on_batch(x), axis=1))
+        true.append(np.argmax(y, axis=1))
+    return np.concatenate(predicted), np.concatenate(true)
+
 def residual_block(x, filters, kernel_size=(3, 3), strides=(1, 1)):
     """İki konvolüsyonel katman içeren residual bloğu tanımlar."""
     shortcut = x
@@ -96,51 +477,419 @@ def residual_block(x, filters, kernel_size=(3, 3), strides=(1, 1)):
     x = add([x, shortcut])
     return Activation('relu')(x)
 
-def build_model(input_shape, num_classes):
-    """Residual blokları içeren CNN modelini oluşturur ve derler."""
-    inputs = Input(shape=input_shape)
-    x = Conv2D(32, (3, 3), padding='same')(inputs)
+def scaled_filters(filters, width=1.0):
+    """Filtre sayısını genişlik çarpanıyla ölçekler (8'in katına yuvarlanır, en az 8)."""
+    return max(8, int(round(filters * width / 8)) * 8)
+
+def conv_bn_relu(x, filters, kernel_size=(3, 3), strides=(1, 1)):
+    x = Conv2D(filters, kernel_size, strides=strides, padding='same', use_bias=False)(x)
+    x = BatchNormalization()(x)
+    return Activation('relu')(x)
+
+def ds_block(x, filters):
+    """Derinlemesine ayrılabilir konvolüsyon: 3x3 depthwise ve 1x1 pointwise katman."""
+    x = DepthwiseConv2D((3, 3), padding='same', use_bias=False)(x)
+    x = BatchNormalization()(x)
+    x = Activation('relu')(x)
+    return conv_bn_relu(x, filters, (1, 1))
+
+def resnet_body(inputs, width=1.0, depth=1):
+    """Özgün mimari: residual bloklar ve Flatten + Dense(256) başlık."""
+    x = Conv2D(scaled_filters(32, width), (3, 3), padding='same')(inputs)
     x = BatchNormalization()(x)
     x = Activation('relu')(x)
     x = MaxPooling2D((2, 2))(x)
     x = Dropout(0.25)(x)
-    x = residual_block(x, 64)
-    x = MaxPooling2D((2, 2))(x)
-    x = Dropout(0.25)(x)
-    x = residual_block(x, 128)
-    x = MaxPooling2D((2, 2))(x)
-    x = Dropout(0.25)(x)
+    for filters in (64, 128):
+        for _ in range(depth):
+            x = residual_block(x, scaled_filters(filters, width))
+        x = MaxPooling2D((2, 2))(x)
+        x = Dropout(0.25)(x)
     x = Flatten()(x)
-    x = Dense(256)(x)
+    x = Dense(scaled_filters(256, width))(x)
     x = BatchNormalization()(x)
     x = Activation('relu')(x)
-    x = Dropout(0.5)(x)
-    outputs = Dense(num_classes, activation='softmax')(x)
+    return Dropout(0.5)(x)
+
+def ds_cnn_body(inputs, width=1.0, depth=1):
+    """
+    Anahtar kelime tespiti için DS-CNN: adımlı giriş konvolüsyonu, 4*depth derinlemesine
+    ayrılabilir blok ve global ortalama havuzlama başlığı.
+    """
+    filters = scaled_filters(64, width)
+    x = conv_bn_relu(inputs, filters, (10, 4), strides=(2, 2))
+    x = Dropout(0.2)(x)
+    for _ in range(4 * depth):
+        x = ds_block(x, filters)
+    x = GlobalAveragePooling2D()(x)
+    return Dropout(0.4)(x)
 
-    model = Model(inputs=inputs, outputs=outputs)
+def cnn_gap_body(inputs, width=1.0, depth=1):
+    """Üç aşamalı düz CNN; her aşamada depth konvolüsyon, Flatten yerine global ortalama havuzlama."""
+    x = inputs
+    for filters in (16, 32, 64):
+        for _ in range(depth):
+            x = conv_bn_relu(x, scaled_filters(filters, width))
+        x = MaxPooling2D((2, 2))(x)
+        x = Dropout(0.2)(x)
+    x = conv_bn_relu(x, scaled_filters(128, width), (1, 1))
+    x = GlobalAveragePooling2D()(x)
+    return Dropout(0.4)(x)
+
+_BODIES = {
+    'resnet': resnet_body,
+    'ds_cnn': ds_cnn_body,
+    'cnn_gap': cnn_gap_body,
+}
+
+def build_model(input_shape, num_classes, architecture='resnet', width=1.0, depth=1):
+    """
+    Seçilen mimariyle CNN modelini oluşturur ve derler. width filtre sayılarını, depth her
+    aşamadaki blok sayısını çarpar; varsayılanlar özgün residual modeli verir.
+    """
+    if architecture not in _BODIES:
+        raise ValueError("Bilinmeyen mimari: %s (seçenekler: %s)" % (architecture, ', '.join(ARCHITECTURES)))
+    inputs = Input(shape=input_shape)
+    x = _BODIES[architecture](inputs, width, depth)
+    # Karışık hassasiyette de softmax çıktısı float32 kalır
+    outputs = Dense(num_classes, activation='softmax', dtype='float32')(x)
+
+    model = Model(inputs=inputs, outputs=outputs, name='%s_w%g_d%d' % (architecture, width, depth))
     model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
     return model
 
+def count_flops(model):
+    """
+    Tek örnek için ileri geçişteki kayan nokta işlemlerini (2 x çarp-topla) analitik olarak
+    sayar; konvolüsyon, derinlemesine konvolüsyon ve tam bağlı katmanlar dikkate alınır.
+    """
+    macs = 0
+    for layer in model.layers:
+        if isinstance(layer, DepthwiseConv2D):
+            _, out_h, out_w, out_c = layer.output.shape
+            macs += out_h * out_w * out_c * layer.kernel_size[0] * layer.kernel_size[1]
+        elif isinstance(layer, Conv2D):
+            _, out_h, out_w, out_c = layer.output.shape
+            in_c = layer.input.shape[-1]
+            macs += out_h * out_w * out_c * in_c * layer.kernel_size[0] * layer.kernel_size[1]
+        elif isinstance(layer, Dense):
+            macs += layer.input.shape[-1] * layer.units
+    return 2 * int(macs)
+
+def measure_latency(model, input_shape, runs=LATENCY_RUNS):
+    """Tek örneklik predict_on_batch çağrısının CPU'daki medyan ve p95 gecikmesini (ms) ölçer."""
+    x = np.zeros((1,) + tuple(input_shape), dtype=np.float32)
+    for _ in range(5):
+        model.predict_on_batch(x)  # Isınma
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        model.predict_on_batch(x)
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times)), float(np.percentile(times, 95))
+
+def variant_report(model, val, model_path):
+    """
+    Varyantın parametre, FLOP, gecikme ve doğrulama doğruluğu özetini loglar ve döndürür.
+    val, (x, y) dizileri ya da akış modundaki doğrulama tf.data kümesidir.
+    """
+    latency_p50, latency_p95 = measure_latency(model, model.input_shape[1:])
+    predicted, true = predict_classes(model, val)
+    accuracy = float(np.mean(predicted == true))
+    report = {
+        'name': model.name,
+        'model_path': model_path,
+        'params': int(model.count_params()),
+        'flops': count_flops(model),
+        'latency_ms_p50': latency_p50,
+        'latency_ms_p95': latency_p95,
+        'val_accuracy': accuracy,
+        'size_kb': os.path.getsize(model_path) / 1024 if os.path.exists(model_path) else None,
+    }
+    logging.info("%s: %d parametre, %.2f MFLOP, gecikme p50 %.2f ms (p95 %.2f ms), doğrulama doğruluğu %.4f",
+                 report['name'], report['params'], report['flops'] / 1e6, latency_p50, latency_p95, accuracy)
+    return report
+
+def save_variant_reports(reports, path=VARIANT_REPORT):
+    """Raporları karşılaştırma dosyasına ekler (aynı adlı eski kayıtların yerine geçer) ve tabloyu loglar."""
+    existing = []
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            existing = json.load(f)
+    names = {r['name'] for r in reports}
+    merged = [r for r in existing if r['name'] not in names] + reports
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(merged, f, indent=2)
+    logging.info("%-22s %10s %10s %10s %9s", 'varyant', 'param', 'MFLOP', 'p50 ms', 'doğruluk')
+    for r in sorted(merged, key=lambda r: r['params']):
+        logging.info("%-22s %10d %10.2f %10.2f %9.4f", r['name'], r['params'], r['flops'] / 1e6,
+                     r['latency_ms_p50'], r['val_accuracy'])
+    logging.info("Varyant karşılaştırması kaydedildi: %s", path)
+
+def representative_dataset(x_calib, n_samples=CALIBRATION_SAMPLES):
+    """int8 kalibrasyonu için eğitim özelliklerinden sabit tohumlu rastgele bir dilim üretir."""
+    rng = np.random.default_rng(0)
+    indices = rng.choice(len(x_calib), size=min(n_samples, len(x_calib)), replace=False)
+    def generator():
+        for i in indices:
+            yield [x_calib[i:i + 1].astype(np.float32)]
+    return generator
+
+def export_tflite(model, x_calib, model_path=MODEL_PATH):
+    """Modeli float16 ve tam int8 eğitim sonrası nicemlenmiş TFLite dosyaları olarak dışa aktarır."""
+    base = os.path.splitext(model_path)[0]
+    paths = {}
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_types = [tf.float16]
+    paths['float16'] = base + '_fp16.tflite'
+    with open(paths['float16'], 'wb') as f:
+        f.write(converter.convert())
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset(x_calib)
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+    converter.inference_output_type = tf.int8
+    paths['int8'] = base + '_int8.tflite'
+    with open(paths['int8'], 'wb') as f:
+        f.write(converter.convert())
+
+    for name, path in paths.items():
+        logging.info("%s TFLite modeli kaydedildi: %s", name, path)
+    return paths
+
+def report_tflite_drift(model, tflite_paths, val, model_path=MODEL_PATH):
+    """Nicemlenmiş modellerin doğrulama kümesindeki (val: variant_report'taki gibi) doğruluk sapmasını ve boyutunu raporlar."""
+    keras_idx, true_idx = predict_classes(model, val)
+    keras_acc = np.mean(keras_idx == true_idx)
+    logging.info("Keras (.h5): doğruluk %.4f, boyut %.1f KB",
+                 keras_acc, os.path.getsize(model_path) / 1024 if os.path.exists(model_path) else float('nan'))
+    report = {'keras': {'accuracy': float(keras_acc)}}
+    for name, path in tflite_paths.items():
+        tflite_idx, _ = predict_classes(TFLiteModel(path), val)
+        acc = np.mean(tflite_idx == true_idx)
+        agreement = np.mean(tflite_idx == keras_idx)
+        size_kb = os.path.getsize(path) / 1024
+        logging.info("%s TFLite: doğruluk %.4f (sapma %+.4f), Keras ile uyum %.4f, boyut %.1f KB",
+                     name, acc, acc - keras_acc, agreement, size_kb)
+        report[name] = {'accuracy': float(acc), 'drift': float(acc - keras_acc),
+                        'agreement': float(agreement), 'size_kb': size_kb}
+    return report
+
+def cpu_flags():
+    """/proc/cpuinfo'daki CPU özellik bayrakları (Linux dışında boş küme)."""
+    try:
+        with open('/proc/cpuinfo', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('flags'):
+                    return set(line.split(':', 1)[1].split())
+    except OSError:
+        pass
+    return set()
+
+def configure_performance(threads=None, inter_threads=INTER_OP_THREADS, precision='auto'):
+    """
+    TensorFlow iş parçacığı sayılarını ve hassasiyet politikasını ayarlar; TensorFlow ilk işlemi
+    çalıştırmadan önce çağrılmalıdır. precision='auto', CPU bfloat16 destekliyorsa
+    mixed_bfloat16 seçer. Seçilen politikayı döndürür.
+    """
+    threads = threads or os.cpu_count() or 1
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(inter_threads)
+    if precision == 'auto':
+        supported = sorted(cpu_flags() & set(BF16_CPU_FLAGS))
+        precision = 'bfloat16' if supported else 'float32'
+        logging.info("bfloat16 CPU desteği: %s", ', '.join(supported) or 'yok')
+    policy = 'mixed_bfloat16' if precision == 'bfloat16' else 'float32'
+    tf.keras.mixed_precision.set_global_policy(policy)
+    logging.info("Performans modu: %d iç / %d dış iş parçacığı, politika %s", threads, inter_threads, policy)
+    return policy
+
+class LinearWarmup(tf.keras.callbacks.Callback):
+    """
+    Öğrenme oranını ilk warmup_epochs boyunca adım adım start'tan target'a çıkarır; sonrasında
+    oranı ReduceLROnPlateau'ya bırakır. Adım sayısı bilinmeyen akışlı kümelerde epoch başına artar.
+    """
+
+    def __init__(self, start, target, warmup_epochs=WARMUP_EPOCHS):
+        super().__init__()
+        self.start, self.target, self.warmup_epochs = start, target, warmup_epochs
+        self.epoch = 0
+        self.done = warmup_epochs <= 0
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.epoch = epoch
+
+    def on_train_batch_begin(self, batch, logs=None):
+        if self.done:
+            return
+        steps = self.params.get('steps')
+        progress = (self.epoch + (batch / steps if steps else 0)) / self.warmup_epochs
+        if progress >= 1:
+            progress, self.done = 1, True
+        self.model.optimizer.learning_rate = self.start + (self.target - self.start) * progress
+
+class ThroughputLogger(tf.keras.callbacks.Callback):
+    """
+    Her epoch'un eğitim kısmı için saniyedeki örnek sayısını loglar (doğrulama hariç).
+    samples epoch başına gerçek örnek sayısıdır; son yığının eksik olması hızı şişirmez.
+    """
+
+    def __init__(self, samples):
+        super().__init__()
+        self.samples = samples
+        self.rates = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.start = self.end = time.perf_counter()
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.end = time.perf_counter()
+
+    def on_epoch_end(self, epoch, logs=None):
+        samples = self.samples
+        seconds = max(self.end - self.start, 1e-9)
+        self.rates.append(samples / seconds)
+        logging.info("Epoch %d: %.0f örnek/s (%d örnek, %.2f s)", epoch + 1, self.rates[-1], samples, seconds)
+
+    def on_train_end(self, logs=None):
+        if len(self.rates) > 1:
+            # İlk epoch grafik derlemesini içerir; ortalamaya katılmaz
+            logging.info("Ortalama eğitim hızı: %.0f örnek/s", np.mean(self.rates[1:]))
+
+def to_float32(model, input_shape, architecture, width, depth):
+    """Karışık hassasiyetle eğitilmiş modeli aynı ağırlıklarla float32 olarak yeniden kurar (çıkarım için)."""
+    policy = tf.keras.mixed_precision.global_policy()
+    tf.keras.mixed_precision.set_global_policy('float32')
+    try:
+        float_model = build_model(input_shape, model.output_shape[-1], architecture, width, depth)
+    finally:
+        tf.keras.mixed_precision.set_global_policy(policy)
+    float_model.set_weights(model.get_weights())
+    return float_model
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ses komut tanıma modelini eğitir.")
+    parser.add_argument('--data', default=DATA_PATH, help="Komut alt klasörlerini içeren veri dizini")
+    parser.add_argument('--corpus', help="Veri dizini yerine 'python corpus.py' ile paketlenmiş korpustan oku")
+    parser.add_argument('--cache', default=CACHE_PATH, help="Özellik önbelleği dizini")
+    parser.add_argument('--no-cache', action='store_true', help="Özellik önbelleğini devre dışı bırak")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Özellik çıkarımı için işçi süreç sayısı (0: tüm çekirdekler)")
+    parser.add_argument('--no-tflite', action='store_true', help="Nicemlenmiş TFLite dışa aktarımını atla")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Özellikleri belleğe almadan tf.data ile akışlı eğit (her epoch yeni veri arttırma)")
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help="Eğitim yığın boyutu")
+    parser.add_argument('--augment', default=','.join(AUGMENTATIONS),
+                        help="Virgülle ayrılmış veri arttırmalar: %s (boş: kapalı)" % ', '.join(AVAILABLE_AUGMENTATIONS))
+    parser.add_argument('--arch', default=DEFAULT_VARIANT[0],
+                        help="Virgülle ayrılmış mimariler: %s" % ', '.join(ARCHITECTURES))
+    parser.add_argument('--width', default=str(DEFAULT_VARIANT[1]), help="Virgülle ayrılmış genişlik çarpanları (ör. 0.25,0.5,1)")
+    parser.add_argument('--depth', default=str(DEFAULT_VARIANT[2]), help="Virgülle ayrılmış derinlik çarpanları (ör. 1,2)")
+    parser.add_argument('--perf', action='store_true',
+                        help="CPU verim modu: iş parçacığı ayarı, bfloat16 ve ısınmalı ölçeklenmiş yığın")
+    parser.add_argument('--threads', type=int, help="--perf: işlem içi iş parçacığı sayısı (varsayılan: tüm çekirdekler)")
+    parser.add_argument('--inter-threads', type=int, default=INTER_OP_THREADS, help="--perf: işlemler arası iş parçacığı sayısı")
+    parser.add_argument('--precision', choices=('auto', 'float32', 'bfloat16'), default='auto',
+                        help="--perf: hesaplama hassasiyeti (auto: CPU destekliyorsa bfloat16)")
+    # XLA'nın CPU konvolüsyonları oneDNN çekirdeklerinden yavaş olabildiği için ayrıca seçilir
+    parser.add_argument('--xla', action='store_true', help="--perf: eğitim adımını XLA ile derle (jit_compile)")
+    parser.add_argument('--batch-scale', type=int, default=PERF_BATCH_SCALE,
+                        help="--perf: yığın boyutu ve öğrenme oranı çarpanı")
+    parser.add_argument('--warmup-epochs', type=int, default=WARMUP_EPOCHS,
+                        help="--perf: ölçeklenmiş öğrenme oranına ısınma süresi (epoch)")
+    return parser.parse_args()
+
+def variant_model_path(architecture, width, depth):
+    """Özgün model MODEL_PATH'e, diğer varyantlar kendi adlarıyla kaydedilir."""
+    if (architecture, width, depth) == DEFAULT_VARIANT:
+        return MODEL_PATH
+    return 'sound_command_model_%s_w%g_d%d.h5' % (architecture, width, depth)
+
+def bundle_path(model_path):
+    """Modelin ayarlarıyla birlikte kaydedildiği paket dizini (.h5 uzantısı olmadan)."""
+    return os.path.splitext(model_path)[0]
+
+def training_config(augmentations):
+    """Eğitimde kullanılan özellik ve veri arttırma ayarları (sweep yapılandırmalarıyla aynı anahtarlar)."""
+    return {'n_mfcc': FEATURE_CONFIG['n_mfcc'], 'max_pad_len': FEATURE_CONFIG['max_pad_len'],
+            'augment': list(augmentations), **augment_settings(augmentations)}
+
 def main():
+    args = parse_args()
+    augmentations = tuple(name for name in args.augment.split(',') if name)
+    batch_size, learning_rate, policy = args.batch_size, LEARNING_RATE, 'float32'
+    if args.perf:
+        # İş parçacığı ayarı TensorFlow ilk işlemi çalıştırmadan, yani veri yüklemeden önce yapılmalı
+        policy = configure_performance(args.threads, args.inter_threads, args.precision)
+        batch_size *= args.batch_scale
+        learning_rate *= args.batch_scale
+        logging.info("Yığın boyutu %d, öğrenme oranı %g (%d epoch ısınma), XLA %s", batch_size, learning_rate,
+                     args.warmup_epochs, 'açık' if args.xla else 'kapalı')
     logging.info("Veri hazırlığı başlatılıyor...")
-    x_train, x_val, y_train, y_val = load_data()
-
-    logging.info("Model oluşturuluyor...")
-    model = build_model(x_train.shape[1:], num_classes=len(COMMANDS))
-    model.summary(print_fn=logging.info)
-
-    callbacks = [
-        EarlyStopping(monitor='val_loss', patience=10, restore_best_weights=True, verbose=1),
-        ModelCheckpoint('sound_command_model_cpu_professional.h5', monitor='val_loss', save_best_only=True, verbose=1),
-        ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=5, verbose=1)
-    ]
-
-    logging.info("Eğitim başlatılıyor...")
-    history = model.fit(
-        x_train, y_train, epochs=100, batch_size=16,
-        validation_data=(x_val, y_val), callbacks=callbacks, verbose=1
-    )
-    logging.info("Eğitim tamamlandı.")
+    if args.streaming:
+        train_ds, val_ds, train_samples = load_streaming_data(data_path=args.data, batch_size=batch_size,
+                                                              augmentations=augmentations, corpus_path=args.corpus)
+        input_shape = feature_shape()
+        fit_args = dict(x=train_ds, validation_data=val_ds)
+        val = val_ds
+    else:
+        x_train, x_val, y_train, y_val = load_data(
+            data_path=args.data, cache_path=None if args.no_cache else args.cache,
+            workers=args.workers or os.cpu_count(), augmentations=augmentations, corpus_path=args.corpus
+        )
+        input_shape, train_samples = x_train.shape[1:], len(x_train)
+        fit_args = dict(x=x_train, y=y_train, batch_size=batch_size, validation_data=(x_val, y_val))
+        val = (x_val, y_val)
+
+    if args.streaming:
+        # Yalnızca kalibrasyon için birkaç eğitim yığını toplanır; doğrulama kümesi yığın yığın okunur
+        x_train, _ = dataset_to_arrays(train_ds, max_batches=CALIBRATION_SAMPLES // batch_size + 1)
+
+    variants = [(arch, float(width), int(depth)) for arch in args.arch.split(',')
+                for width in args.width.split(',') for depth in args.depth.split(',')]
+    reports = []
+    for architecture, width, depth in variants:
+        model_path = variant_model_path(architecture, width, depth)
+        logging.info("Model oluşturuluyor: %s (genişlik %g, derinlik %d)", architecture, width, depth)
+        model = build_model(input_shape, num_classes=len(COMMANDS), architecture=architecture,
+                            width=width, depth=depth)
+        model.summary(print_fn=logging.info)
+        if args.perf:
+            model.compile(optimizer=tf.keras.optimizers.Adam(LEARNING_RATE), loss='categorical_crossentropy',
+                          metrics=['accuracy'], jit_compile=args.xla)
+
+        callbacks = [
+            EarlyStopping(monitor='val_loss', patience=PATIENCE, restore_best_weights=True, verbose=1),
+            ModelCheckpoint(model_path, monitor='val_loss', save_best_only=True, verbose=1),
+            ReduceLROnPlateau(monitor='val_loss', factor=0.5, patience=PATIENCE // 2, verbose=1),
+            ThroughputLogger(train_samples)
+        ]
+        if learning_rate != LEARNING_RATE:
+            callbacks.insert(0, LinearWarmup(LEARNING_RATE, learning_rate, args.warmup_epochs))
+
+        logging.info("Eğitim başlatılıyor...")
+        history = model.fit(epochs=EPOCHS, callbacks=callbacks, verbose=1, **fit_args)
+        logging.info("Eğitim tamamlandı.")
+
+        # En iyi kontrol noktası raporlanır ve dışa aktarılır; nicemleme sapması doğrulama kümesinde ölçülür
+        best_model = tf.keras.models.load_model(model_path)
+        if policy != 'float32':
+            # Kaydedilen model, bfloat16 desteği olmayan cihazlarda da çalışsın diye float32'ye çevrilir
+            best_model = to_float32(best_model, input_shape, architecture, width, depth)
+            best_model.save(model_path)
+        # Özellik ve veri arttırma ayarları modelin yanında paket olarak saklanır; finetune.py
+        # eski doğrulama kümesini bu ayarlarla birebir yeniden kurar
+        save_bundle(bundle_path(model_path), best_model, _engine, COMMANDS,
+                    name=os.path.basename(bundle_path(model_path)), config=training_config(augmentations))
+        reports.append(variant_report(best_model, val, model_path))
+        if not args.no_tflite:
+            tflite_paths = export_tflite(best_model, x_train, model_path)
+            report_tflite_drift(best_model, tflite_paths, val, model_path)
+    save_variant_reports(reports)
 
 if __name__ == '__main__':
     main()